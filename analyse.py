@@ -0,0 +1,95 @@
+from engine import Engine, BOARD_BACKENDS, EVALUATORS, move_to_string, position_to_string
+from parallel import ParallelSearch
+from stats import log_search_stats
+import argparse
+import logging
+import sys
+import time
+
+# Batch analysis of Othello positions, without any screen.
+# Each line of the input is a position: 64 box characters (X black, O white, - empty) and the player to move (X or O).
+# Empty lines and lines starting with # are ignored. For each position, one line is written on the standard output:
+# the position, the best move (or "pass") and its value.
+#
+#   python analyse.py positions.txt --depth 3
+#   python analyse.py positions.txt --depth 4 --workers 8 --compare
+#   echo "---------------------------OX------XO--------------------------- X" | python analyse.py
+#   python analyse.py positions.txt --stats --timed 2> stats.log
+#   python analyse.py positions.txt --profile search.prof
+
+
+# This function parses the command line arguments
+def parse_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Searches the best move of each position of a file.")
+    parser.add_argument("positions", nargs="?", default="-",
+                        help="file of positions, one per line (default: standard input)")
+    parser.add_argument("--depth", type=int, default=3, help="search depth (default: 3)")
+    parser.add_argument("--backend", choices=sorted(BOARD_BACKENDS), default="bitboard", help="board implementation")
+    parser.add_argument("--evaluator", choices=EVALUATORS, default="squares", help="evaluation of the leaves")
+    parser.add_argument("--pattern-tables", help="with --evaluator patterns, file of fitted tables (see pattern.py)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes searching the root moves in parallel (default: 1, serial search)")
+    parser.add_argument("--compare", action="store_true",
+                        help="with --workers, also run the serial search and report the speedup on standard error")
+    parser.add_argument("--stats", action="store_true",
+                        help="write the statistics of each search as a JSON line on standard error")
+    parser.add_argument("--timed", action="store_true",
+                        help="with --stats, also measure the time spent in each part of the search (slower)")
+    parser.add_argument("--profile", help="run each search under cProfile and save the profile of the last one here")
+    arguments = parser.parse_args(arguments)
+    # The parallel searches run in the worker processes, which have no search hooks and no profiler
+    if arguments.workers > 1:
+        for option, value in (("--stats", arguments.stats), ("--timed", arguments.timed),
+                              ("--profile", arguments.profile)):
+            if value:
+                parser.error(f"{option} only works with the serial search (--workers 1)")
+    return arguments
+
+
+# This function analyses the positions of an iterable of lines, and yields one result line per position.
+# The searcher is the engine itself or a ParallelSearch, they have the same search method
+def analyse_lines(engine: Engine, searcher, lines, depth: int, compare: bool = False):
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            board, player = engine.board_from_string(line)
+        except ValueError as error:
+            print(f"line {line_number}: {error}", file=sys.stderr)
+            continue
+        if compare:
+            comparison = searcher.compare_with_serial(board, player, depth)
+            print(f"line {line_number}: serial {comparison['serial_time']:.3f}s, "
+                  f"parallel {comparison['parallel_time']:.3f}s with {comparison['workers']} workers, "
+                  f"speedup {comparison['speedup']:.2f}, same move: {comparison['same_move']}", file=sys.stderr)
+        best_move, value = searcher.search(board, player, depth)
+        if best_move is None:  # The player has to pass
+            yield f"{position_to_string(board, player)} pass"
+        else:
+            yield f"{position_to_string(board, player)} {move_to_string(best_move)} {value:g}"
+
+
+def main(arguments=None):
+    arguments = parse_arguments(arguments)
+    engine = Engine(backend=arguments.backend, timed_stats=arguments.timed, profile_path=arguments.profile,
+                    evaluator=arguments.evaluator, pattern_tables=arguments.pattern_tables)
+    if arguments.stats:
+        logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+        engine.add_search_hook(log_search_stats)
+    searcher = ParallelSearch(engine, arguments.workers) if arguments.workers > 1 else engine
+    positions = sys.stdin if arguments.positions == "-" else open(arguments.positions)
+    start = time.perf_counter()
+    count = 0
+    with positions:
+        for result in analyse_lines(engine, searcher, positions, arguments.depth,
+                                    arguments.compare and searcher is not engine):
+            print(result, flush=True)   # Results are streamed, one line as soon as a position is analysed
+            count += 1
+    if searcher is not engine:
+        searcher.close()
+    print(f"{count} positions analysed in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
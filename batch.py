@@ -0,0 +1,60 @@
+import numpy as np
+from board import DIRECTIONS, SQUARE_WEIGHTS
+
+# Batch versions of the grid processing methods of Board: they take a stack of N grids, an array of shape
+# (N, row_count, column_count) holding the player keys (0 for an empty box), and process all of them at once
+# with array operations instead of Python loops over the boxes.
+
+
+# This function returns the stack of grids moved by (x_direction, y_direction): the box (row, col) of the result holds
+# the box (row + x_direction, col + y_direction) of the grids, or False/0 if this box is outside the grid
+def shift_grids(grids: np.ndarray, x_direction: int, y_direction: int, distance: int = 1):
+    row_shift = x_direction * distance
+    column_shift = y_direction * distance
+    row_count, column_count = grids.shape[1], grids.shape[2]
+    shifted = np.zeros_like(grids)
+    if abs(row_shift) >= row_count or abs(column_shift) >= column_count:
+        return shifted
+    target_rows = slice(max(0, -row_shift), row_count - max(0, row_shift))
+    target_columns = slice(max(0, -column_shift), column_count - max(0, column_shift))
+    source_rows = slice(max(0, row_shift), row_count + min(0, row_shift))
+    source_columns = slice(max(0, column_shift), column_count + min(0, column_shift))
+    shifted[:, target_rows, target_columns] = grids[:, source_rows, source_columns]
+    return shifted
+
+
+# This function returns, for each grid and each box, the number of pieces that the player would flip by playing on
+# this box (0 if the move is not available). The result has the shape of the grids
+def flip_counts(grids: np.ndarray, player_key: int, other_key: int):
+    grids = np.asarray(grids)
+    player_pieces = grids == player_key
+    other_pieces = grids == other_key
+    empty = grids == 0
+    max_distance = max(grids.shape[1], grids.shape[2])
+    counts = np.zeros(grids.shape, dtype=np.int64)
+    for x_direction, y_direction in DIRECTIONS:    # Let's test in all the directions
+        line = empty.copy()  # Boxes whose line of opponent pieces is still open at this distance
+        for distance in range(1, max_distance):
+            if distance >= 2:
+                # The line of distance - 1 opponent pieces is closed by a player piece, they are flipped
+                closed = line & shift_grids(player_pieces, x_direction, y_direction, distance)
+                counts += closed * (distance - 1)
+            line &= shift_grids(other_pieces, x_direction, y_direction, distance)
+            if not line.any():
+                break
+    return counts
+
+
+# This function returns, for each grid, a boolean mask of the boxes where the player can play
+def legal_move_masks(grids: np.ndarray, player_key: int, other_key: int):
+    return flip_counts(grids, player_key, other_key) > 0
+
+
+# This function is the batch version of the heuristic evaluation of the engine (Engine.evaluate_board): the square
+# weights of the pieces of the player, multiplied by his key, plus 1.5 times the number of pieces turned by the last
+# move. It returns one value per grid
+def evaluate_grids(grids: np.ndarray, player_key: int, turned_coins, square_weight=SQUARE_WEIGHTS):
+    grids = np.asarray(grids)
+    weights = np.asarray(square_weight, dtype=np.float64)
+    totals = ((grids == player_key) * weights).sum(axis=(1, 2)) * player_key
+    return totals + 1.5 * np.asarray(turned_coins, dtype=np.float64)
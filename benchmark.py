@@ -0,0 +1,341 @@
+from engine import Engine, BOARD_BACKENDS, BLACK, DIFFICULTY_TIMES, move_to_string
+from board import check_board_size
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+# Benchmarks of the engine, to know whether a change made the AI slower:
+#   - perft: number of move sequences of each length from the starting position, which also checks the move generation
+#   - evaluation: number of heuristic evaluations per second
+#   - search: time to move and nodes per second of fixed-depth searches on fixed midgame and endgame positions
+#   - timed: depth reached and time overshoot of the timed search of each difficulty of the game on the same positions
+#   - memory: peak memory allocated by a search
+#   - sizes (with --sizes): how the move generation, perft, the search time and its memory grow with the board size
+#   - parity: whether every backend chooses the same move with the same value as the NumPy board on random positions
+# The results are written as JSON. With --compare, they are compared with a previous result file and the program exits
+# with the status 1 if a throughput dropped by more than the threshold (or if a perft count is wrong).
+#
+#   python benchmark.py --output baseline.json
+#   python benchmark.py --compare baseline.json --threshold 0.1
+#   python benchmark.py --sizes 6 8 10 12 14 16
+
+# Global constant variable
+
+PERFT_COUNTS = {1: 4, 2: 12, 3: 56, 4: 244, 5: 1396, 6: 8200, 7: 55092, 8: 390216}  # Known counts of the 8x8 game
+
+BENCHMARK_POSITIONS = {  # Fixed positions of the search benchmark (see string_to_position)
+    "midgame-1": "-O-X------OX-------XO-----XXO----XXXO----XOXO---OO-OOX--O---O--- X",
+    "midgame-2": "-------X------X--XXXXX----XXXX--OOXXXO---OOOOX---XXXX---X--X---- X",
+    "midgame-3": "--O-O-----OOOO--XXO-OOOO-OXXOO--OXXXOO--X-X-OX-----XXOX-------OX X",
+    "late-midgame": "--OOO-OXOOOOOOXX-OXXOXOXXXXOXOOXOOOOOOO--OOXX---OOOOOX-----OOOOO X",
+    "endgame-1": "-O-XXXX-OOOOOO-O-OOXOXO-XXOOOXXXXX-OOXXXXXOOOX-XXX-OXOXX-XXXXXOX X",
+    "endgame-2": "OXXXOOOOOXXX-XOOXOOXXXXXOOXOOXXX-OOOOXXXXOOOXOXX--X-XXO--X-XXX-O O",
+}
+SEARCH_DEPTHS = (1, 2, 3)   # Depths of the fixed-depth search benchmark
+DIFFICULTIES = tuple(DIFFICULTY_TIMES)  # Difficulties of the game (time budgets) of the timed search benchmark
+EVALUATION_COUNT = 20000    # Number of evaluations of the evaluation benchmark
+REPEAT_COUNT = 3    # Each benchmark is run this number of times, the fastest run is kept
+REGRESSION_THRESHOLD = 0.1  # Default relative drop of throughput that is reported as a regression
+MINIMUM_COMPARED_TIME = 0.01    # Benchmarks shorter than this (in seconds) are too noisy to be compared
+SIZE_OPENING_PLIES = 10     # Random moves played from the start to get the position of the size benchmark
+SIZE_PERFT_DEPTH = 4    # Depth of perft in the size benchmark
+MOVE_GENERATION_COUNT = 2000    # Number of move generations of the size benchmark
+PARITY_POSITIONS = 15   # Number of random positions of the parity check
+PARITY_DEPTHS = (1, 2, 3)   # Search depths of the parity check
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Benchmarks
+
+# This function returns the number of move sequences of the given length from the position. A pass counts as a move,
+# and a finished game is a leaf. The board is back to its position at the end
+def perft(engine: Engine, board, player: int, depth: int):
+    if depth == 0:
+        return 1
+    other_player = engine.other_player(player)
+    board.is_there_valid_move(player, other_player)
+    moves = board.available_moves
+    if not moves:
+        board.is_there_valid_move(other_player, player)
+        if not board.available_moves:   # Nobody can play, the game is over
+            return 1
+        return perft(engine, board, other_player, depth - 1)    # The player has to pass
+    total = 0
+    for move in moves:
+        board.make_move(move[0], move[1], player)
+        total += perft(engine, board, other_player, depth - 1)
+        board.unmake_move()
+    return total
+
+
+# This function runs perft from the starting position for each depth until max_depth
+def benchmark_perft(engine: Engine, max_depth: int, repeat: int = REPEAT_COUNT):
+    results = []
+    for depth in range(1, max_depth + 1):
+        board = engine.new_board()
+        seconds = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            nodes = perft(engine, board, BLACK, depth)
+            seconds = min(seconds, time.perf_counter() - start)
+        expected = PERFT_COUNTS.get(depth) if (engine.row_count, engine.column_count) == (8, 8) else None
+        results.append({"depth": depth,
+                        "nodes": nodes,
+                        "expected": expected,
+                        "correct": expected is None or nodes == expected,
+                        "seconds": seconds,
+                        "nodes_per_second": nodes / seconds if seconds else 0.0})
+    return results
+
+
+# This function measures the heuristic evaluation on the benchmark positions
+def benchmark_evaluation(engine: Engine, count: int = EVALUATION_COUNT, repeat: int = REPEAT_COUNT):
+    positions = [engine.board_from_string(position) for position in BENCHMARK_POSITIONS.values()]
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for index in range(count):
+            board, player = positions[index % len(positions)]
+            engine.evaluate_board(board, player, 1)
+        seconds = min(seconds, time.perf_counter() - start)
+    return {"evaluations": count,
+            "seconds": seconds,
+            "nodes_per_second": count / seconds if seconds else 0.0}
+
+
+# This function measures the search of each depth on each benchmark position. Every search starts with an empty
+# transposition table, so that the results do not depend on the order of the searches
+def benchmark_search(engine: Engine, depths=SEARCH_DEPTHS, repeat: int = REPEAT_COUNT):
+    results = []
+    for name, position in BENCHMARK_POSITIONS.items():
+        for depth in depths:
+            board, player = engine.board_from_string(position)
+            seconds = float('inf')
+            for _ in range(repeat):
+                engine.clear()
+                start = time.perf_counter()
+                best_move, value = engine.search(board, player, depth)
+                seconds = min(seconds, time.perf_counter() - start)
+            results.append({"position": name,
+                            "depth": depth,
+                            "move": move_to_string(best_move) if best_move is not None else "pass",
+                            "value": value,
+                            "nodes": engine.nodes_visited,
+                            "seconds": seconds,
+                            "nodes_per_second": engine.nodes_visited / seconds if seconds else 0.0,
+                            "table_hit_rate": engine.stats.table_hit_rate})
+    return results
+
+
+# This function measures the timed search of each difficulty of the game (see DIFFICULTY_TIMES) on each benchmark
+# position, like the AI plays: the depth it completed and by how much it overshot its time budget. These searches
+# always last about their budget, so they are run once and left out of the throughput comparison
+def benchmark_timed(engine: Engine, difficulties=DIFFICULTIES):
+    results = []
+    for name, position in BENCHMARK_POSITIONS.items():
+        for difficulty in difficulties:
+            board, player = engine.board_from_string(position)
+            engine.clear()
+            start = time.perf_counter()
+            best_move, value, depth = engine.search_timed(board, player, DIFFICULTY_TIMES[difficulty])
+            seconds = time.perf_counter() - start
+            results.append({"position": name,
+                            "difficulty": difficulty,
+                            "time_limit": DIFFICULTY_TIMES[difficulty],
+                            "move": move_to_string(best_move) if best_move is not None else "pass",
+                            "value": value,
+                            "depth": depth,
+                            "seconds": seconds,
+                            "overshoot": seconds - DIFFICULTY_TIMES[difficulty]})
+    return results
+
+
+# This function returns the peak memory allocated by a search of the given depth on the midgame positions,
+# measured with tracemalloc (it is run apart from the other benchmarks, since tracemalloc slows down the code)
+def benchmark_memory(engine: Engine, depth: int = max(SEARCH_DEPTHS)):
+    engine.clear()
+    tracemalloc.start()
+    for name, position in BENCHMARK_POSITIONS.items():
+        if name.startswith("midgame"):
+            board, player = engine.board_from_string(position)
+            engine.search(board, player, depth)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"depth": depth, "peak_bytes": peak}
+
+
+# This function returns a position reached by random moves from the starting position (the same for a given seed,
+# whatever the backend: the moves are drawn in the grid order)
+def random_position(engine: Engine, plies: int, seed: int = 0):
+    board, player = engine.replay_moves(engine.random_moves(plies, random.Random(seed)))
+    board.undo_stack.clear()
+    return board, player
+
+
+# This function measures how the engine scales with the size of the board. For each size (square boards), on a
+# position reached by random moves: the move generations per second, perft from the starting position, the time, the
+# nodes per second and the peak memory of a search of the given depth
+def benchmark_sizes(sizes, backend: str, depth: int = max(SEARCH_DEPTHS), repeat: int = REPEAT_COUNT):
+    results = []
+    for size in sizes:
+        engine = Engine(size, size, backend)
+        board, player = random_position(engine, SIZE_OPENING_PLIES)
+        other_player = engine.other_player(player)
+        generation_seconds = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(MOVE_GENERATION_COUNT):
+                board.is_there_valid_move(player, other_player)
+            generation_seconds = min(generation_seconds, time.perf_counter() - start)
+        perft_result = benchmark_perft(engine, SIZE_PERFT_DEPTH, repeat)[-1]
+        search_seconds = float('inf')
+        for _ in range(repeat):
+            engine.clear()
+            start = time.perf_counter()
+            engine.search(board, player, depth)
+            search_seconds = min(search_seconds, time.perf_counter() - start)
+        nodes = engine.nodes_visited
+        engine.clear()
+        tracemalloc.start()
+        engine.search(board, player, depth)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append({"size": size,
+                        "boxes": size * size,
+                        "move_generations_per_second": MOVE_GENERATION_COUNT / generation_seconds,
+                        "perft_depth": SIZE_PERFT_DEPTH,
+                        "perft_nodes": perft_result["nodes"],
+                        "perft_nodes_per_second": perft_result["nodes_per_second"],
+                        "depth": depth,
+                        "nodes": nodes,
+                        "seconds": search_seconds,
+                        "nodes_per_second": nodes / search_seconds if search_seconds else 0.0,
+                        "peak_bytes": peak})
+    return results
+
+
+# This function checks that the backends choose the same moves: on positions reached by random moves, each backend
+# searches each depth and its move and value are compared with the ones of the NumPy board (the board of the original
+# game). The moves of equal value are chosen in the order of the scan of the grid (see Board.scan_ordered_moves),
+# whatever the order in which the backend finds them. It returns the differences, as a list of dictionaries
+def backend_parity(count: int = PARITY_POSITIONS, depths=PARITY_DEPTHS):
+    reference = Engine(backend="numpy", endgame_empties=-1)
+    engines = [Engine(backend=backend, endgame_empties=-1) for backend in sorted(BOARD_BACKENDS) if backend != "numpy"]
+    differences = []
+    for seed in range(count):
+        plies = 4 + seed * 3 % 40
+        for depth in depths:
+            board, player = random_position(reference, plies, seed)
+            reference.clear()
+            expected = reference.search(board, player, depth)
+            for engine in engines:
+                board, player = random_position(engine, plies, seed)
+                engine.clear()
+                found = engine.search(board, player, depth)
+                if found != expected:
+                    differences.append({"backend": engine.backend, "plies": plies, "seed": seed, "depth": depth,
+                                        "expected": expected, "found": found})
+    return differences
+
+
+# This function runs all the benchmarks and returns their results
+def run_benchmarks(engine: Engine, perft_depth: int, depths=SEARCH_DEPTHS, repeat: int = REPEAT_COUNT,
+                   sizes=(), difficulties=DIFFICULTIES):
+    results = {"backend": engine.backend,
+               "python": platform.python_version(),
+               "perft": benchmark_perft(engine, perft_depth, repeat),
+               "evaluation": benchmark_evaluation(engine, repeat=repeat),
+               "search": benchmark_search(engine, depths, repeat),
+               "timed": benchmark_timed(engine, difficulties),
+               "memory": benchmark_memory(engine, max(depths)),
+               "parity": backend_parity()}
+    if sizes:
+        results["sizes"] = benchmark_sizes(sizes, engine.backend, max(depths), repeat)
+    return results
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Comparison
+
+# This function returns the throughputs (nodes per second) of a result, by benchmark name. The benchmarks that are
+# too short to be measured reliably are left out. The search depth is named "difficulty" in the older result files
+def throughputs(results: dict):
+    measures = [(f"perft-{result['depth']}", result) for result in results["perft"]]
+    measures.append(("evaluation", results["evaluation"]))
+    measures += [(f"search-{result['position']}-{result.get('depth', result.get('difficulty'))}", result)
+                 for result in results["search"]]
+    measures += [(f"size-{result['size']}", result) for result in results.get("sizes", [])]
+    return {name: result["nodes_per_second"] for name, result in measures
+            if result["seconds"] >= MINIMUM_COMPARED_TIME}
+
+
+# This function returns the list of the wrong perft counts of a result, and of the moves where the backends differ
+def perft_errors(results: dict):
+    errors = [f"perft-{result['depth']}: {result['nodes']} nodes instead of {result['expected']}"
+              for result in results["perft"] if not result["correct"]]
+    errors += [f"parity: {result['backend']} plays {result['found']} instead of {result['expected']} at depth "
+               f"{result['depth']} (seed {result['seed']}, {result['plies']} plies)"
+               for result in results.get("parity", [])]
+    return errors
+
+
+# This function compares the results with a baseline. It returns the list of the regressions: the wrong perft counts,
+# and the benchmarks whose throughput dropped by more than the threshold (relative)
+def compare_results(results: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD):
+    regressions = perft_errors(results)
+    baseline_values = throughputs(baseline)
+    for name, value in throughputs(results).items():
+        if name not in baseline_values or baseline_values[name] <= 0:   # Nothing to compare with
+            continue
+        change = value / baseline_values[name] - 1
+        if change < -threshold:
+            regressions.append(f"{name}: {value:.0f} nodes/s instead of {baseline_values[name]:.0f} ({change:+.1%})")
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the move generation, the evaluation and the search.")
+    parser.add_argument("--backend", choices=sorted(BOARD_BACKENDS), default="bitboard", help="board implementation")
+    parser.add_argument("--perft-depth", type=int, default=6, help="maximum depth of perft (default: 6)")
+    parser.add_argument("--depths", type=int, nargs="+", default=list(SEARCH_DEPTHS),
+                        help="depths of the fixed-depth search benchmark (default: 1 2 3)")
+    parser.add_argument("--difficulties", type=int, nargs="+", choices=DIFFICULTIES, default=list(DIFFICULTIES),
+                        help="difficulties of the game measured by the timed search benchmark (default: 1 2 3)")
+    parser.add_argument("--repeat", type=int, default=REPEAT_COUNT,
+                        help="number of runs of each benchmark, the fastest one is kept (default: 3)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[],
+                        help="also measure how the engine scales with these board sizes (like 6 8 10 12 14 16)")
+    parser.add_argument("--output", default="-", help="JSON file of the results (default: standard output)")
+    parser.add_argument("--compare", help="JSON file of previous results to compare with")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="relative drop of throughput that fails the comparison (default: 0.1)")
+    arguments = parser.parse_args(arguments)
+
+    try:
+        for size in arguments.sizes:
+            check_board_size(size, size)
+    except ValueError as error:
+        parser.error(str(error))
+    results = run_benchmarks(Engine(backend=arguments.backend), arguments.perft_depth, arguments.depths,
+                             arguments.repeat, arguments.sizes, arguments.difficulties)
+    if arguments.output == "-":
+        print(json.dumps(results, indent=2))
+    else:
+        with open(arguments.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    regressions = perft_errors(results)
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            regressions = compare_results(results, json.load(file), arguments.threshold)
+    for regression in regressions:
+        print(f"regression: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+import numpy as np
+from board import Board, DIRECTIONS
+
+# Global constant variable
+
+BITBOARD_GEOMETRY = {}  # Masks and shifts of the bitboards, computed once for each (row_count, column_count)
+
+
+# This class is a row view of a BitGrid, it allows the usual grid[row][col] reading and writing syntax
+class BitGridRow:
+    def __init__(self, board, row: int):
+        self.board = board  # Bitboard that owns the pieces
+        self.row = row  # Row represented by this view
+
+    def __getitem__(self, col: int):
+        return self.board.get_square(self.row, col)
+
+    def __setitem__(self, col: int, key: int):
+        self.board.set_square(self.row, col, key)
+
+    def __len__(self):
+        return self.board.column_count
+
+
+# This class emulates the NumPy grid of the Board class on top of the bitboards, so that the code reading
+# or writing board.grid[row][col] keeps working with the bitboard backend
+class BitGrid:
+    def __init__(self, board):
+        self.board = board  # Bitboard that owns the pieces
+
+    def __getitem__(self, row: int):
+        return BitGridRow(self.board, row)
+
+    def __len__(self):
+        return self.board.row_count
+
+    def __iter__(self):
+        return (BitGridRow(self.board, row) for row in range(self.board.row_count))
+
+    def __array__(self, dtype=None, copy=None):
+        grid = self.board.to_array()
+        return grid if dtype is None else grid.astype(dtype)
+
+
+# This function computes (once per board size) the masks and shifts used by the bitboards:
+# the mask of the whole grid, the (shift, mask) pair of each direction and the maximum length of a line
+def bitboard_geometry(row_count: int, column_count: int):
+    if (row_count, column_count) not in BITBOARD_GEOMETRY:
+        full_mask = (1 << (row_count * column_count)) - 1  # Every box of the grid
+        not_first_column = 0
+        not_last_column = 0
+        for row in range(row_count):
+            for col in range(column_count):
+                if col != 0:
+                    not_first_column |= 1 << (row * column_count + col)
+                if col != column_count - 1:
+                    not_last_column |= 1 << (row * column_count + col)
+        # For each direction, the bit shift and the mask of the boxes that can move in this direction
+        # without wrapping around the edge of the grid
+        shifts = []
+        for x_direction, y_direction in DIRECTIONS:
+            mask = full_mask
+            if y_direction == 1:
+                mask = not_last_column
+            elif y_direction == -1:
+                mask = not_first_column
+            shifts.append((x_direction * column_count + y_direction, mask))
+        ray_steps = max(row_count, column_count) - 3  # Maximum extra opponent pieces in a line
+        BITBOARD_GEOMETRY[(row_count, column_count)] = (full_mask, shifts, ray_steps)
+    return BITBOARD_GEOMETRY[(row_count, column_count)]
+
+
+# This class represents the game board with one integer per player, each bit being a box of the grid.
+# The box (row, col) is the bit number row * column_count + col. It keeps the same interface as Board
+# (available_moves, is_there_valid_move, update_grid, count_points, copy_board) so it can replace it.
+class BitBoard(Board):
+    uses_frontier = False   # The moves are found with the shifts of the bitboards (see moves_bits)
+
+    def __init__(self, row_count, column_count, color, screen_size):
+        # Bitboard parameters, they must exist before Board.__init__ assigns the grid
+        self.bits = [0, 0, 0]  # Pieces of each player, indexed by the player key (index 0 is unused)
+        self.full_mask, self.shifts, self.ray_steps = bitboard_geometry(row_count, column_count)
+        self.last_flipped_bits = 0  # Bitboard of the boxes flipped by the last call of update_grid
+        self.patterns = None    # Pattern indexes (see Board), read by the grid setter
+        super().__init__(row_count, column_count, color, screen_size)
+        self.grid_view = BitGrid(self)  # Grid emulation, built once since it only reads the bitboards
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Grid emulation methods
+
+    @property
+    def grid(self):
+        return self.grid_view
+
+    @grid.setter
+    def grid(self, grid):
+        # Loading a (NumPy) grid in the bitboards
+        self.bits = [0, 0, 0]
+        for row in range(self.row_count):
+            for col in range(self.column_count):
+                key = int(grid[row][col])
+                if key:
+                    self.bits[key] |= 1 << (row * self.column_count + col)
+        self.zobrist_hash = self.compute_hash()
+        self.disc_counts, self.positional_scores = self.recount_scores()
+        if self.patterns is not None:
+            self.patterns.load(self.to_array().ravel().tolist())
+
+    # This method returns the key of the player on the box (row, col), 0 if the box is empty
+    def get_square(self, row: int, col: int):
+        bit = 1 << (row * self.column_count + col)
+        if self.bits[1] & bit:
+            return 1
+        if self.bits[2] & bit:
+            return 2
+        return 0
+
+    # This method puts the piece of a player on the box (row, col), or empties it if the key is 0
+    def set_square(self, row: int, col: int, key: int):
+        index = row * self.column_count + col
+        old_key = self.get_square(row, col)
+        if old_key:
+            self.bits[old_key] &= ~(1 << index)
+            self.zobrist_hash ^= self.zobrist_keys[old_key][index]
+            self.disc_counts[old_key] -= 1
+            self.positional_scores[old_key] -= self.flat_weights[index]
+        if key:
+            key = int(key)
+            self.bits[key] |= 1 << index
+            self.zobrist_hash ^= self.zobrist_keys[key][index]
+            self.disc_counts[key] += 1
+            self.positional_scores[key] += self.flat_weights[index]
+        if self.patterns is not None:
+            self.patterns.change(index, old_key, int(key))
+
+    # This method computes the Zobrist hash of the grid from scratch
+    def compute_hash(self):
+        zobrist_hash = 0
+        for key in (1, 2):
+            bits = self.bits[key]
+            while bits:
+                lowest_bit = bits & -bits
+                zobrist_hash ^= self.zobrist_keys[key][lowest_bit.bit_length() - 1]
+                bits ^= lowest_bit
+        return zobrist_hash
+
+    # This method counts the pieces and sums the square weights of each player by reading the whole bitboards
+    def recount_scores(self):
+        disc_counts = [0, 0, 0]
+        positional_scores = [0, 0, 0]
+        for key in (1, 2):
+            for row, col in self.bits_to_positions(self.bits[key]):
+                disc_counts[key] += 1
+                positional_scores[key] += self.square_weight[row][col]
+        return disc_counts, positional_scores
+
+    # This method builds the NumPy grid equivalent to the bitboards
+    def to_array(self):
+        box_count = self.row_count * self.column_count
+        byte_count = (box_count + 7) // 8
+        grid = np.zeros(box_count)
+        for key in (1, 2):
+            pieces = np.unpackbits(np.frombuffer(self.bits[key].to_bytes(byte_count, "little"), dtype=np.uint8),
+                                   bitorder="little")[:box_count]
+            grid[pieces == 1] = key
+        return grid.reshape((self.row_count, self.column_count))
+
+    # This method returns the logical grid as a NumPy array
+    def grid_array(self):
+        return self.to_array()
+
+    # This method returns the bitboards of the grid, the integers of the white and black pieces
+    def bitboards(self):
+        return self.bits[1], self.bits[2]
+
+    # This method converts a bitboard in the list of the (row, col) positions of its bits, in the grid order
+    def bits_to_positions(self, bits: int):
+        positions = []
+        while bits:
+            lowest_bit = bits & -bits
+            positions.append(divmod(lowest_bit.bit_length() - 1, self.column_count))
+            bits ^= lowest_bit
+        return positions
+
+    # This method returns the available moves in the order of the scan of the grid (see Board.scan_ordered_moves). The
+    # moves are found in the grid order, the rank of each one in the scan is computed like Board.is_there_valid_move
+    # does, from the pieces at the end of its rays. It is only done for the root moves of the searches, so the move
+    # generation of the other nodes keeps its speed
+    def scan_ordered_moves(self, next_player_key: int, last_player_key: int):
+        player_bits, opponent_bits = self.bits[next_player_key], self.bits[last_player_key]
+        found = []  # (rank of the move in the scan of the grid, move)
+        for move in self.available_moves:
+            rank = None
+            for ray, direction in self.frontier_rays[move[0] * self.column_count + move[1]]:
+                if opponent_bits >> ray[0] & 1:
+                    for target in ray[1:]:
+                        if not opponent_bits >> target & 1:
+                            break
+                    else:   # The pieces of the opponent go until the side of the grid
+                        continue
+                    if player_bits >> target & 1:
+                        target_rank = target * 8 + direction
+                        if rank is None or target_rank < rank:
+                            rank = target_rank
+            found.append((rank, move))
+        found.sort()
+        return [move for _, move in found]
+
+    # This method returns the number of empty boxes of the grid: the bits set in neither bitboard
+    def count_empties(self):
+        return bin(~(self.bits[1] | self.bits[2]) & self.full_mask).count("1")
+
+    # This method allows to copy the board without memory reference
+    # The copy is done attribute by attribute, because building a new board would compute again its whole geometry
+    def copy_board(self, screen_size):
+        board = BitBoard.__new__(BitBoard)
+        board.__dict__.update(self.__dict__)
+        board.bits = self.bits[:]
+        board.disc_counts = self.disc_counts[:]
+        board.positional_scores = self.positional_scores[:]
+        board.available_moves = []
+        board.undo_stack = []
+        board.grid_view = BitGrid(board)
+        if self.patterns is not None:
+            board.patterns = self.patterns.copy()
+        return board
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Processing grid methods
+
+    # This method returns the bitboard of all the boxes where the player can play
+    def moves_bits(self, player_bits: int, opponent_bits: int):
+        empty = ~(player_bits | opponent_bits) & self.full_mask
+        moves = 0
+        for shift, mask in self.shifts:
+            # Opponent pieces adjacent to the player pieces in this direction, then extended along the line
+            if shift > 0:
+                line = ((player_bits & mask) << shift) & opponent_bits
+                for _ in range(self.ray_steps):
+                    line |= ((line & mask) << shift) & opponent_bits
+                moves |= ((line & mask) << shift) & empty
+            else:
+                line = ((player_bits & mask) >> -shift) & opponent_bits
+                for _ in range(self.ray_steps):
+                    line |= ((line & mask) >> -shift) & opponent_bits
+                moves |= ((line & mask) >> -shift) & empty
+        return moves
+
+    # This method returns the bitboard of the pieces flipped by a piece played on the bit move_bit,
+    # and the number of lines (directions) in which pieces are flipped
+    def flips_bits(self, move_bit: int, player_bits: int, opponent_bits: int):
+        flipped = 0
+        lines = 0
+        for shift, mask in self.shifts:
+            line = 0
+            if shift > 0:
+                x = ((move_bit & mask) << shift) & self.full_mask
+                while x & opponent_bits:
+                    line |= x
+                    x = ((x & mask) << shift) & self.full_mask
+            else:
+                x = (move_bit & mask) >> -shift
+                while x & opponent_bits:
+                    line |= x
+                    x = (x & mask) >> -shift
+            if x & player_bits and line:  # The line of opponent pieces is closed by a player piece
+                flipped |= line
+                lines += 1
+        return flipped, lines
+
+    # This method allows us to determine the moves that are available in the next turn
+    # and to save them in the attribute of the class (available_move : array)
+    def is_there_valid_move(self, next_player_key: int, last_player_key: int):
+        moves = self.moves_bits(self.bits[next_player_key], self.bits[last_player_key])
+        self.available_moves = self.bits_to_positions(moves)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Grid editing methods
+
+    # This method places a piece of a player on an empty box, keeping the hash of the grid up to date
+    def place_piece(self, row: int, col: int, player_key: int):
+        index = row * self.column_count + col
+        self.bits[player_key] |= 1 << index
+        self.zobrist_hash ^= self.zobrist_keys[player_key][index]
+        self.disc_counts[player_key] += 1
+        self.positional_scores[player_key] += self.flat_weights[index]
+        if self.patterns is not None:
+            self.patterns.change(index, 0, player_key)
+
+    # After each move, this method is called to update the grid by flipping the necessary pieces
+    # This function also return the number of pieces that have been flipped
+    def update_grid(self, row_click: int, column_click: int, player_key: int):
+        other_key = 2 if player_key == 1 else 1
+        move_bit = 1 << (row_click * self.column_count + column_click)
+        flipped, lines = self.flips_bits(move_bit, self.bits[player_key], self.bits[other_key])
+        self.last_flipped_bits = flipped   # Bitboard of the boxes flipped by this call
+        self.bits[player_key] |= flipped
+        self.bits[other_key] &= ~flipped
+        other_zobrist_keys = self.zobrist_keys[other_key]
+        player_zobrist_keys = self.zobrist_keys[player_key]
+        patterns = self.patterns
+        flipped_count = 0
+        flipped_weight = 0
+        while flipped:
+            lowest_bit = flipped & -flipped
+            index = lowest_bit.bit_length() - 1
+            self.zobrist_hash ^= other_zobrist_keys[index] ^ player_zobrist_keys[index]
+            if patterns is not None:
+                patterns.change(index, other_key, player_key)
+            flipped_weight += self.flat_weights[index]
+            flipped ^= lowest_bit
+            flipped_count += 1
+        self.disc_counts[player_key] += flipped_count
+        self.disc_counts[other_key] -= flipped_count
+        self.positional_scores[player_key] += flipped_weight
+        self.positional_scores[other_key] -= flipped_weight
+        # Like Board.update_grid, the played box is counted once for each line in which pieces are flipped
+        return flipped_count + lines    # We return the number of pieces that we flipped
+
+    # This method returns the (row, col) positions of the pieces flipped by the last call of update_grid
+    def flipped_boxes(self):
+        return self.bits_to_positions(self.last_flipped_bits)
+
+    # This method plays a move on the board (placing the piece and flipping the others), and saves what is needed to
+    # undo it with unmake_move. This function also return the number of pieces that have been flipped, like update_grid
+    def make_move(self, row: int, col: int, player_key: int):
+        zobrist_hash = self.zobrist_hash
+        if self.patterns is not None:
+            self.patterns.save()
+        self.place_piece(row, col, player_key)
+        s = self.update_grid(row, col, player_key)
+        self.undo_stack.append((row, col, player_key, self.last_flipped_bits, zobrist_hash))
+        return s
+
+    # This method undoes the last move done with make_move, the bitboards are restored exactly
+    def unmake_move(self):
+        row, col, player_key, flipped, zobrist_hash = self.undo_stack.pop()
+        other_key = 2 if player_key == 1 else 1
+        move_bit = 1 << (row * self.column_count + col)
+        self.bits[player_key] &= ~(flipped | move_bit)
+        self.bits[other_key] |= flipped
+        self.zobrist_hash = zobrist_hash
+        flipped_count = 0
+        flipped_weight = 0
+        while flipped:
+            lowest_bit = flipped & -flipped
+            flipped_weight += self.flat_weights[lowest_bit.bit_length() - 1]
+            flipped ^= lowest_bit
+            flipped_count += 1
+        self.disc_counts[player_key] -= flipped_count + 1
+        self.disc_counts[other_key] += flipped_count
+        self.positional_scores[player_key] -= flipped_weight + self.flat_weights[move_bit.bit_length() - 1]
+        self.positional_scores[other_key] += flipped_weight
+        if self.patterns is not None:
+            self.patterns.restore()
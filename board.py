@@ -1,4 +1,6 @@
 import numpy as np
+from transposition import zobrist_keys
+from symmetry import canonical_form
 
 # Global constant variable
 
@@ -13,7 +15,7 @@ DIRECTIONS = [  # Represents all the possible directions in a two-dimensional sp
     [1, -1],
 ]
 
-SQUARE_WEIGHTS = [  # Matrix representing the game grid weighted by the importance of the positions to win
+SQUARE_WEIGHTS = [  # Matrix representing the 8x8 game grid weighted by the importance of the positions to win
     [120, -20, 20, 5, 5, 20, -20, 120],
     [-20, -40, -5, -5, -5, -5, -40, -20],
     [20, -5, 15, 3, 3, 15, -5, 20],
@@ -24,20 +26,136 @@ SQUARE_WEIGHTS = [  # Matrix representing the game grid weighted by the importan
     [120, -20, 20, 5, 5, 20, -20, 120],
 ]
 
+RAY_TABLES = {}     # Ray table of each board size (row count, column count), see ray_table
+WEIGHT_TABLES = {}  # Square weights of each board size (row count, column count), see square_weights
+NEIGHBOUR_TABLES = {}   # Neighbour table of each board size (row count, column count), see neighbour_table
+FRONTIER_RAY_TABLES = {}    # Frontier ray table of each board size (row count, column count), see frontier_ray_table
+
+MIN_BOARD_SIZE = 6  # Smallest number of rows or columns of a board
+MAX_BOARD_SIZE = 16     # Largest number of rows or columns of a board
+
+
+# This function checks that a board size is supported: an even number of rows and columns, between MIN_BOARD_SIZE and
+# MAX_BOARD_SIZE, so that the four starting pieces are in the centre of the grid. It raises ValueError otherwise
+def check_board_size(row_count: int, column_count: int):
+    for count in (row_count, column_count):
+        if count % 2 or not MIN_BOARD_SIZE <= count <= MAX_BOARD_SIZE:
+            raise ValueError(f"unsupported board size {row_count}x{column_count}: the numbers of rows and columns "
+                             f"must be even, from {MIN_BOARD_SIZE} to {MAX_BOARD_SIZE}")
+
+
+# This function returns the square weights of a board size, built from the 8x8 weights: a box gets the weight of the
+# 8x8 box that is at the same distances from the nearest sides of the grid, the distances above 3 counting as 3. The
+# corners, the boxes next to them and the edges keep their weights on every size, and the 8x8 grid gets SQUARE_WEIGHTS
+def square_weights(row_count: int, column_count: int):
+    if (row_count, column_count) not in WEIGHT_TABLES:
+        weights = []
+        for row in range(row_count):
+            row_distance = min(row, row_count - 1 - row, 3)
+            weights.append([SQUARE_WEIGHTS[row_distance][min(col, column_count - 1 - col, 3)]
+                            for col in range(column_count)])
+        WEIGHT_TABLES[(row_count, column_count)] = weights
+    return WEIGHT_TABLES[(row_count, column_count)]
+
+
+# This function returns the boxes of the starting pieces of a board size: the two white boxes and the two black boxes
+# of the four boxes in the centre of the grid
+def starting_boxes(row_count: int, column_count: int):
+    row, col = row_count // 2, column_count // 2
+    return [(row - 1, col - 1), (row, col)], [(row, col - 1), (row - 1, col)]
+
+
+# This function returns the ray table of a board size: for each box (index row * column_count + col), the tuple of its
+# rays in the order of DIRECTIONS. A ray is the tuple of the indexes of the boxes met from the box in one direction
+# until the side of the grid, without the box itself. The rays of less than two boxes cannot flip any piece, they are
+# left out. The table is built once per board size and shared by all the boards
+def ray_table(row_count: int, column_count: int):
+    if (row_count, column_count) not in RAY_TABLES:
+        table = []
+        for row in range(row_count):
+            for col in range(column_count):
+                rays = []
+                for x_direction, y_direction in DIRECTIONS:
+                    ray = []
+                    x, y = row + x_direction, col + y_direction
+                    while 0 <= x < row_count and 0 <= y < column_count:
+                        ray.append(x * column_count + y)
+                        x, y = x + x_direction, y + y_direction
+                    if len(ray) >= 2:
+                        rays.append(tuple(ray))
+                table.append(tuple(rays))
+        RAY_TABLES[(row_count, column_count)] = tuple(table)
+    return RAY_TABLES[(row_count, column_count)]
+
+
+# This function returns the neighbour table of a board size: for each box (index row * column_count + col), the tuple
+# of the indexes of the boxes around it. The table is built once per board size and shared by all the boards
+def neighbour_table(row_count: int, column_count: int):
+    if (row_count, column_count) not in NEIGHBOUR_TABLES:
+        table = []
+        for row in range(row_count):
+            for col in range(column_count):
+                table.append(tuple((row + x_direction) * column_count + col + y_direction
+                                   for x_direction, y_direction in DIRECTIONS
+                                   if 0 <= row + x_direction < row_count and 0 <= col + y_direction < column_count))
+        NEIGHBOUR_TABLES[(row_count, column_count)] = tuple(table)
+    return NEIGHBOUR_TABLES[(row_count, column_count)]
+
+
+# This function returns the frontier ray table of a board size: for each box, the pairs (ray, direction) of its rays
+# (see ray_table), where direction is the number in DIRECTIONS of the way back from the end of the ray to the box. A
+# move found from a box with one of its rays is the move found by scanning the grid from the piece at the end of the
+# ray in this direction, which tells in which order the scan of the grid would find the moves
+def frontier_ray_table(row_count: int, column_count: int):
+    if (row_count, column_count) not in FRONTIER_RAY_TABLES:
+        table = []
+        for index, rays in enumerate(ray_table(row_count, column_count)):
+            pairs = []
+            for ray in rays:
+                x_direction = index // column_count - ray[0] // column_count
+                y_direction = index % column_count - ray[0] % column_count
+                pairs.append((ray, DIRECTIONS.index([x_direction, y_direction])))
+            table.append(tuple(pairs))
+        FRONTIER_RAY_TABLES[(row_count, column_count)] = tuple(table)
+    return FRONTIER_RAY_TABLES[(row_count, column_count)]
+
 
 # This class represents the game board, composed of the logical grid and the board display parameters.
 class Board:
+    debug = False   # If True, the cached scores are checked against a full recount each time they are read
+    uses_frontier = True    # Whether the moves are found from the frontier and the flat cells (not with the bitboards)
+
     def __init__(self, row_count, column_count, color, screen_size):
         # Logical board parameters
         self.row_count = row_count   # Number of rows of the board
         self.column_count = column_count    # Number of columns of the board
+        self.zobrist_keys = zobrist_keys(self.row_count, self.column_count)[0]  # Zobrist key of each (player, box)
+        self.square_weight = square_weights(self.row_count, self.column_count)   # Square weights of this size
+        self.flat_weights = [weight for row in self.square_weight for weight in row]  # Square weight of each box
+        self.rays = ray_table(self.row_count, self.column_count)    # Rays of each box, shared by the boards
+        self.neighbours = neighbour_table(self.row_count, self.column_count)  # Boxes around each box, shared too
+        self.frontier_rays = frontier_ray_table(self.row_count, self.column_count)  # Rays read from the frontier
+        # Frontier: indexes of the empty boxes next to a piece, the only boxes where a move can be played. It is kept up
+        # to date at each placed piece (the flips do not change it). The bitboards do not use it (see bitboard.py)
+        self.frontier = set()
+        # Flat copy of the grid (the key of each box), kept up to date with it: the boxes are read one by one, faster
+        # in a list than in the NumPy array
+        self.cells = [0] * (self.row_count * self.column_count)
+        self.frontier_change = (False, [])  # Change of the frontier by the last placed piece, see place_piece
+        self.disc_counts = [0, 0, 0]    # Number of pieces of each player, indexed by the player key
+        self.positional_scores = [0, 0, 0]  # Sum of the square weights of the pieces of each player
         self.grid = np.zeros((self.row_count, self.column_count))   # Logical grid of the board
         self.available_moves = []   # List of all the possible moves for the current player at each moment of the game
-        self.square_weight = SQUARE_WEIGHTS
+        self.zobrist_hash = 0   # Hash of the grid, updated at each placed or flipped piece (0 is the empty grid)
+        self.last_flipped = []  # Boxes flipped by the last call of update_grid
+        self.undo_stack = []    # Moves done with make_move, with what is needed to undo them
+        self.patterns = None    # Pattern indexes kept up to date with the grid, if any (see pattern.PatternIndexes)
 
         # Display board parameters
         self.color = color   # Color of the board
-        self.box_size = 50   # Size of each box of the board (they are squares, so we just need one value)
+        # Size of each box of the board (they are squares, so we just need one value), smaller for the large boards so
+        # that the board fits in the screen
+        self.box_size = min(50, 400 // max(self.row_count, self.column_count))
         self.radius = int(self.box_size / 2 - 5)    # Radius of the board pieces (no matter the color/player)
         self.board_size = (self.row_count * self.box_size, self.column_count * self.box_size)   # Size of the board
         # Screen is (1000*600)
@@ -51,7 +169,7 @@ class Board:
 
     # This method just return a boolean value that indicates if the position is inside the grid or not
     def overflow(self, x: int, y: int):
-        return not (0 <= x <= self.column_count - 1 and 0 <= y <= self.row_count - 1)
+        return not (0 <= x <= self.row_count - 1 and 0 <= y <= self.column_count - 1)
 
     # This method just return a boolean value that indicates if the click is inside the display board
     def is_clicked(self, mouse_position: (float, float)):
@@ -62,6 +180,13 @@ class Board:
     def copy_board(self, screen_size):
         board = Board(self.row_count, self.column_count, (89, 139, 44), screen_size)
         board.grid = np.copy(self.grid)
+        board.zobrist_hash = self.zobrist_hash
+        board.disc_counts = self.disc_counts[:]
+        board.positional_scores = self.positional_scores[:]
+        board.frontier = set(self.frontier)
+        board.cells = self.cells[:]
+        if self.patterns is not None:
+            board.patterns = self.patterns.copy()
         return board
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -69,66 +194,230 @@ class Board:
 
     # This method allows us to determine the moves that are available in the next turn
     # and to save them in the attribute of the class (available_move : array)
+    # Only the boxes of the frontier can be moves: from each of them, the rays are followed until a piece of the next
+    # player closes a line of pieces of the last player. The moves are given in the order in which a scan of the pieces
+    # of the next player, box by box and direction by direction, finds them: the best move of a search (the first one
+    # in case of a tie) does not depend on the way the moves are found
     def is_there_valid_move(self, next_player_key: int, last_player_key: int):
-        self.available_moves = []   # Reset the available moves from the previous turn
-        for row in range(self.row_count):
-            for col in range(self.column_count):
-                if self.grid[row][col] == next_player_key:  # if a box is filled by the next player
-                    for x_direction, y_direction in DIRECTIONS:    # Let's test in all the directions
-                        x = row + x_direction
-                        y = col + y_direction
-                        if not self.overflow(x, y) and self.grid[x][y] == last_player_key:
-                            x += x_direction
-                            y += y_direction
-                            while not self.overflow(x, y) and self.grid[x][y] == last_player_key:
-                                x += x_direction
-                                y += y_direction
-                            if not self.overflow(x, y) and self.grid[x][y] == 0 and (x, y) not in self.available_moves:
-                                # If this position allows the next player to convert the opponent's pieces
-                                # and the position is on the grid, then it is a valid move. We save it
-                                self.available_moves.append((x, y))
+        cells = self.cells
+        found = []  # (rank of the move in the scan of the grid, index of the move)
+        for index in self.frontier:
+            rank = None
+            for ray, direction in self.frontier_rays[index]:    # Let's test in all the directions
+                if cells[ray[0]] == last_player_key:
+                    for target in ray[1:]:
+                        if cells[target] != last_player_key:
+                            break
+                    else:   # The pieces of the opponent go until the side of the grid
+                        continue
+                    if cells[target] == next_player_key:
+                        # The next player can convert the opponent's pieces from this box, it is a valid move. The scan
+                        # finds it from the piece on the target box, in the direction back to this box
+                        target_rank = target * 8 + direction
+                        if rank is None or target_rank < rank:
+                            rank = target_rank
+            if rank is not None:
+                found.append((rank, index))
+        found.sort()
+        self.available_moves = [divmod(index, self.column_count) for _, index in found]
+
+    # This method returns the available moves found by is_there_valid_move in the order of the scan of the grid (see
+    # is_there_valid_move). The searches break the ties between equal moves with this order, so that every backend
+    # chooses the move of the original minimax. The moves of this board are already in this order
+    def scan_ordered_moves(self, next_player_key: int, last_player_key: int):
+        return list(self.available_moves)
+
+    # This method computes the frontier of the grid from scratch
+    def compute_frontier(self):
+        cells = self.cells
+        return {index for index, cell in enumerate(cells)
+                if cell == 0 and any(cells[neighbour] for neighbour in self.neighbours[index])}
 
     # This method allows us to count the points of a specific player whose key we have passed in parameter
+    # The number of pieces of each player is kept up to date at each placed or flipped piece
     def count_points(self, piece_key: int):
-        s = 0  # s represents the amount of piece of his color that the player has on the board
+        if self.debug:
+            self.check_cached_scores()
+        return self.disc_counts[piece_key]
+
+    # This method returns the number of empty boxes of the grid
+    def count_empties(self):
+        return self.row_count * self.column_count - self.count_points(1) - self.count_points(2)
+
+    # This method allows us to sum the square weights of the pieces of a specific player, weighted by his key
+    # The sum of the square weights of each player is kept up to date at each placed or flipped piece
+    def weighted_points(self, piece_key: int):
+        if self.debug:
+            self.check_cached_scores()
+        return self.positional_scores[piece_key] * piece_key
+
+    # This method counts the pieces and sums the square weights of each player by reading the whole grid
+    def recount_scores(self):
+        disc_counts = [0, 0, 0]
+        positional_scores = [0, 0, 0]
         for row in range(self.row_count):
             for col in range(self.column_count):
-                if self.grid[row][col] == piece_key:
-                    s += 1
-        return s
+                key = int(self.grid[row][col])
+                if key:
+                    disc_counts[key] += 1
+                    positional_scores[key] += self.square_weight[row][col]
+        return disc_counts, positional_scores
+
+    # This method is a debug check: it raises an error if the cached scores are different from a full recount
+    def check_cached_scores(self):
+        disc_counts, positional_scores = self.recount_scores()
+        if disc_counts[1:] != self.disc_counts[1:] or positional_scores[1:] != self.positional_scores[1:]:
+            raise AssertionError(f"cached scores {self.disc_counts[1:]} {self.positional_scores[1:]} differ from "
+                                 f"the grid {disc_counts[1:]} {positional_scores[1:]}")
+
+    # This method returns the logical grid as a NumPy array (the grid itself, it must not be modified)
+    def grid_array(self):
+        return self.grid
+
+    # This method returns the bitboards of the grid (see bitboard.py): the integers of the white and black pieces
+    def bitboards(self):
+        cells = self.grid.ravel()
+        return tuple(int.from_bytes(np.packbits(cells == key, bitorder="little").tobytes(), "little")
+                     for key in (1, 2))
+
+    # This method returns the canonical form of the grid among its symmetric images (see symmetry.py): the bitboards
+    # (white, black) of the canonical grid, and the transform that gives it. A move of the canonical grid is mapped
+    # back to this board with symmetry.restore_move
+    def canonical_form(self):
+        white_bits, black_bits, transform = canonical_form(*self.bitboards(), self.row_count, self.column_count)
+        return (white_bits, black_bits), transform
+
+    # This method computes the Zobrist hash of the grid from scratch
+    def compute_hash(self):
+        zobrist_hash = 0
+        for row in range(self.row_count):
+            for col in range(self.column_count):
+                if self.grid[row][col]:
+                    zobrist_hash ^= self.zobrist_keys[int(self.grid[row][col])][row * self.column_count + col]
+        return zobrist_hash
 
     # ------------------------------------------------------------------------------------------------------------------
     # Grid editing methods
 
+    # This method places a piece of a player on an empty box, it must be used instead of editing the grid directly
+    # so that the hash of the grid stays up to date
+    def place_piece(self, row: int, col: int, player_key: int):
+        self.grid[row][col] = player_key
+        self.cells[row * self.column_count + col] = player_key
+        self.zobrist_hash ^= self.zobrist_keys[player_key][row * self.column_count + col]
+        self.disc_counts[player_key] += 1
+        self.positional_scores[player_key] += self.flat_weights[row * self.column_count + col]
+        if self.patterns is not None:
+            self.patterns.change(row * self.column_count + col, 0, player_key)
+        self.update_frontier(row * self.column_count + col)
+
+    # This method updates the frontier when a piece is placed on a box: the box leaves it and the empty boxes around it
+    # join it. What changed is saved in frontier_change, so that unmake_move can restore the frontier
+    def update_frontier(self, index: int):
+        cells = self.cells
+        frontier = self.frontier
+        was_in_frontier = index in frontier
+        frontier.discard(index)
+        added = [neighbour for neighbour in self.neighbours[index]
+                 if not cells[neighbour] and neighbour not in frontier]
+        frontier.update(added)
+        self.frontier_change = (was_in_frontier, added)
+
     # After each move, this method is called to update the grid by flipping the necessary pieces
     # This function also return the number of pieces that have been flipped
     def update_grid(self, row_click: int, column_click: int, player_key: int):
         s = 0   # Represent the number of pieces that will be flipped
+        self.last_flipped = []
         if player_key == 1:
             other_key = 2
         else:
             other_key = 1
-        for x_direction, y_direction in DIRECTIONS:  # Let's test in all the directions
-            x = row_click + x_direction
-            y = column_click + y_direction
-            if not self.overflow(x, y) and self.grid[x][y] == other_key:
-                x += x_direction
-                y += y_direction
-                while not self.overflow(x, y) and self.grid[x][y] == other_key:
-                    x += x_direction
-                    y += y_direction
-                if not self.overflow(x, y) and self.grid[x][y] == player_key:
+        cells = self.cells
+        grid = self.grid.reshape(-1)    # Flat view of the grid, the changes are done in the grid and in the cells
+        patterns = self.patterns
+        start = row_click * self.column_count + column_click
+        for ray in self.rays[start]:    # Let's test in all the directions
+            if cells[ray[0]] == other_key:
+                for distance, target in enumerate(ray):
+                    if cells[target] != other_key:
+                        break
+                else:   # The pieces of the opponent go until the side of the grid
+                    continue
+                if cells[target] == player_key:
                     # If we find another piece of the same color after passing through pieces of a different colour
-                    # Then we do the same path in backwards while flipping the pieces we find
-                    # until we come back to the starting position
-                    while x != row_click or y != column_click:
-                        x -= x_direction
-                        y -= y_direction
-                        s += 1
-                        self.grid[x][y] = player_key
+                    # Then we flip the pieces between them
+                    s += distance + 1   # The played box is counted too
+                    for index in ray[:distance]:
+                        self.last_flipped.append(divmod(index, self.column_count))
+                        self.zobrist_hash ^= self.zobrist_keys[other_key][index] ^ self.zobrist_keys[player_key][index]
+                        self.positional_scores[other_key] -= self.flat_weights[index]
+                        self.positional_scores[player_key] += self.flat_weights[index]
+                        cells[index] = player_key
+                        grid[index] = player_key
+                        if patterns is not None:
+                            patterns.change(index, other_key, player_key)
+                    cells[start] = player_key
+                    grid[start] = player_key
+        self.disc_counts[player_key] += len(self.last_flipped)
+        self.disc_counts[other_key] -= len(self.last_flipped)
         return s    # We return the number of pieces that we flipped
 
+    # This method returns the (row, col) positions of the pieces flipped by the last call of update_grid
+    def flipped_boxes(self):
+        return list(self.last_flipped)
+
+    # This method plays a move on the board (placing the piece and flipping the others), and saves what is needed to
+    # undo it with unmake_move. It allows the search to simulate moves on one board instead of copying it at each node
+    # This function also return the number of pieces that have been flipped, like update_grid
+    def make_move(self, row: int, col: int, player_key: int):
+        zobrist_hash = self.zobrist_hash
+        if self.patterns is not None:
+            self.patterns.save()
+        self.place_piece(row, col, player_key)
+        s = self.update_grid(row, col, player_key)
+        self.undo_stack.append((row, col, player_key, self.last_flipped, zobrist_hash, self.frontier_change))
+        return s
+
+    # This method undoes the last move done with make_move, the grid is restored exactly
+    def unmake_move(self):
+        row, col, player_key, flipped, zobrist_hash, (was_in_frontier, added) = self.undo_stack.pop()
+        other_key = 2 if player_key == 1 else 1
+        self.frontier.difference_update(added)
+        if was_in_frontier:
+            self.frontier.add(row * self.column_count + col)
+        for x, y in flipped:
+            self.grid[x][y] = other_key
+            self.cells[x * self.column_count + y] = other_key
+            self.positional_scores[player_key] -= self.flat_weights[x * self.column_count + y]
+            self.positional_scores[other_key] += self.flat_weights[x * self.column_count + y]
+        self.grid[row][col] = 0
+        self.cells[row * self.column_count + col] = 0
+        self.zobrist_hash = zobrist_hash
+        self.disc_counts[player_key] -= len(flipped) + 1
+        self.disc_counts[other_key] += len(flipped)
+        self.positional_scores[player_key] -= self.flat_weights[row * self.column_count + col]
+        if self.patterns is not None:
+            self.patterns.restore()
+
+    # This method replaces the logical grid of the board by a copy of another grid
+    def load_grid(self, grid):
+        self.grid = np.array(grid, dtype=float)
+        self.zobrist_hash = self.compute_hash()
+        self.disc_counts, self.positional_scores = self.recount_scores()
+        if self.uses_frontier:
+            self.cells = [int(cell) for cell in self.grid.ravel().tolist()]
+            self.frontier = self.compute_frontier()
+        if self.patterns is not None:
+            self.patterns.load(self.grid_array().ravel().tolist())
+
     # This method resets the logical grid of the board
     def reset_board(self):
         self.grid = np.zeros((self.row_count, self.column_count))
-
+        self.zobrist_hash = 0
+        self.disc_counts = [0, 0, 0]
+        self.positional_scores = [0, 0, 0]
+        if self.uses_frontier:
+            self.frontier = set()
+            self.cells = [0] * (self.row_count * self.column_count)
+        if self.patterns is not None:
+            self.patterns.load(self.grid_array().ravel().tolist())
@@ -0,0 +1,230 @@
+from engine import Engine, SCREEN_SIZE, WHITE, BLACK, string_to_move
+from transposition import zobrist_keys
+from symmetry import transform_move, restore_move
+from records import read_records
+import argparse
+import mmap
+import random
+import re
+import struct
+import sys
+
+# Opening book: a sorted binary file of (position hash -> best move, score, visit count) records.
+# The file is opened with mmap and searched by dichotomy, so that it is never loaded in memory and opening it does not
+# depend on its size.
+#
+#   python book.py assets/book.bin --self-play 200 --plies 12 --depth 2
+#   python book.py assets/book.bin --games games.txt --plies 20
+#   python book.py assets/book.bin --records records/games.bin --plies 20
+#
+# A games file has one game per line, written as the list of its moves ("f5d6c3d3c4f4...").
+# The positions are saved in their canonical form (see symmetry.py), so the symmetric positions share one record and
+# their move is mapped back to the board looked up.
+
+# Global constant variable
+
+BOOK_MAGIC = b"OTHBOOK2"    # First bytes of a book file
+OLD_BOOK_MAGICS = (b"OTHBOOK1",)    # Books of older versions (not canonical positions), they have to be built again
+HEADER_FORMAT = "<8sHHI"    # Magic, row count, column count, number of records
+RECORD_FORMAT = "<QHfI"     # Position hash, best move (row * column_count + col), score, visit count
+# The score of a move is the average final disc difference of the games where it was played, for the player to move
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+
+# This function returns the key of a position in the book: the Zobrist hash of its canonical grid and of the player to
+# move. It also returns the transform of the canonical grid, the book moves are the moves of the canonical grid
+def position_key(board, player: int):
+    (white_bits, black_bits), transform = board.canonical_form()
+    piece_keys, side_keys, _ = zobrist_keys(board.row_count, board.column_count)
+    key = side_keys[player]
+    for bits, keys in ((white_bits, piece_keys[WHITE]), (black_bits, piece_keys[BLACK])):
+        while bits:
+            lowest_bit = bits & -bits
+            key ^= keys[lowest_bit.bit_length() - 1]
+            bits ^= lowest_bit
+    return key, transform
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# This class reads a book file. Only the header is read when the book is opened, the records are read from the
+# memory-mapped file when a position is looked up
+class OpeningBook:
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.row_count, self.column_count, self.record_count = struct.unpack_from(HEADER_FORMAT, self.map, 0)
+        if magic != BOOK_MAGIC:
+            self.close()
+            if magic in OLD_BOOK_MAGICS:
+                raise ValueError(f"{path} is a book of an older version, it has to be built again")
+            raise ValueError(f"{path} is not an opening book")
+        # Statistics
+        self.lookups = 0    # Number of lookups
+        self.hits = 0   # Number of lookups that found the position
+
+    # This method returns the record (best move, score, visit count) of a position key, or None if it is unknown
+    def lookup(self, key: int):
+        self.lookups += 1
+        low, high = 0, self.record_count
+        while low < high:   # Dichotomy on the sorted records
+            middle = (low + high) // 2
+            record_key = struct.unpack_from("<Q", self.map, HEADER_SIZE + middle * RECORD_SIZE)[0]
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                _, move_index, score, visits = struct.unpack_from(RECORD_FORMAT, self.map,
+                                                                  HEADER_SIZE + middle * RECORD_SIZE)
+                self.hits += 1
+                return divmod(move_index, self.column_count), score, visits
+        return None
+
+    # This method returns the book move of the player on the board and its score, or (None, None) if the position is
+    # not in the book. The move is checked against the available moves, in case of a hash collision
+    def book_move(self, board, player: int):
+        if (board.row_count, board.column_count) != (self.row_count, self.column_count):
+            return None, None
+        key, transform = position_key(board, player)
+        record = self.lookup(key)
+        if record is None:
+            return None, None
+        move, score, _ = record
+        move = restore_move(move, transform, self.row_count, self.column_count)
+        search_board = board.copy_board(SCREEN_SIZE)
+        search_board.is_there_valid_move(player, WHITE if player == BLACK else BLACK)
+        if move not in search_board.available_moves:
+            return None, None
+        return move, score
+
+    # This method closes the book file
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# This class builds a book file from self-play games or from lists of games
+class BookBuilder:
+    def __init__(self, engine: Engine, plies: int):
+        self.engine = engine
+        self.plies = plies  # Only the positions of the first plies of the games are saved in the book
+        self.positions = {}  # For each position key, a dictionary {move: [visit count, sum of the scores]}
+
+    # This method saves one occurrence of a move played in a position, with its score. The move is the one of the
+    # canonical grid of the position (see position_key)
+    def add_position(self, key: int, move: (int, int), score: float):
+        statistics = self.positions.setdefault(key, {}).setdefault(move, [0, 0.0])
+        statistics[0] += 1
+        statistics[1] += score
+
+    # This method replays a game given as a list of moves from the starting position, and adds its first positions to
+    # the book. The score of each move is the final disc difference for the player who played it
+    def add_game(self, moves: list):
+        played = []  # (position key, player, move) of the first plies
+
+        # This function is called by the replay before each move
+        def visit(board, player: int, move: (int, int)):
+            if len(played) < self.plies:
+                key, transform = position_key(board, player)
+                played.append((key, player, transform_move(move, transform, board.row_count, board.column_count)))
+
+        board, _ = self.engine.replay_moves(moves, visit)
+        for key, player, move in played:
+            score = board.count_points(player) - board.count_points(self.engine.other_player(player))
+            self.add_position(key, move, score)
+
+    # This method plays games of the engine against itself until their end, and adds their first positions to the book
+    # like add_game: the score of each move is the final disc difference for the player who played it. To get different
+    # openings, a random move is played instead of the best one with the given probability during the first plies
+    def add_self_play(self, games: int, depth: int, randomness: float = 0.3, seed: int = 0):
+        generator = random.Random(seed)
+        for _ in range(games):
+            board = self.engine.new_board()
+            player = BLACK
+            moves = []
+            passes = 0
+            while passes < 2:   # The game ends when both players have to pass
+                best_move, _ = self.engine.search(board, player, depth)
+                if best_move is None:   # The player has to pass
+                    passes += 1
+                    player = self.engine.other_player(player)
+                    continue
+                passes = 0
+                move = best_move
+                if len(moves) < self.plies and generator.random() < randomness:
+                    board.is_there_valid_move(player, self.engine.other_player(player))
+                    move = generator.choice(board.available_moves)
+                board.make_move(move[0], move[1], player)
+                moves.append(move)
+                player = self.engine.other_player(player)
+            self.add_game(moves)
+
+    # This method writes the book file: for each position, the most played move, its average score and the number of
+    # times the position was seen, sorted by position key
+    def write(self, path: str):
+        records = []
+        for key, moves in self.positions.items():
+            move, (visits, score_sum) = max(moves.items(), key=lambda item: (item[1][0], item[1][1] / item[1][0]))
+            total_visits = sum(statistics[0] for statistics in moves.values())
+            records.append((key, move[0] * self.engine.column_count + move[1], score_sum / visits, total_visits))
+        records.sort()
+        with open(path, "wb") as file:
+            file.write(struct.pack(HEADER_FORMAT, BOOK_MAGIC, self.engine.row_count, self.engine.column_count,
+                                   len(records)))
+            for record in records:
+                file.write(struct.pack(RECORD_FORMAT, *record))
+        return len(records)
+
+
+# This function converts a game written as the list of its moves ("f5d6c3...") into a list of moves (row, col)
+def string_to_game(text: str):
+    text = "".join(text.split())
+    moves = re.findall(r"[a-zA-Z][0-9]+", text)   # The row numbers of the large boards have two digits ("a10")
+    if "".join(moves) != text:
+        raise ValueError(f"invalid game {text!r}")
+    return [string_to_move(move) for move in moves]
+
+
+# This function reads a games file: one game per line, written as its list of moves. It yields the lines of the games
+def read_games(path: str):
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Builds an opening book file.")
+    parser.add_argument("output", help="book file to write")
+    parser.add_argument("--games", help="file of games to import, one list of moves per line")
+    parser.add_argument("--records", help="game archive to import (see records.py)")
+    parser.add_argument("--self-play", type=int, default=0, help="number of self-play games to add")
+    parser.add_argument("--plies", type=int, default=12, help="number of plies of each game saved in the book")
+    parser.add_argument("--depth", type=int, default=2, help="search depth of the self-play games")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the self-play openings")
+    arguments = parser.parse_args(arguments)
+
+    builder = BookBuilder(Engine(), arguments.plies)
+    if arguments.games:
+        for line_number, game in enumerate(read_games(arguments.games), 1):
+            try:
+                builder.add_game(string_to_game(game))
+            except ValueError as error:
+                print(f"game {line_number}: {error}", file=sys.stderr)
+    if arguments.records:
+        for game_number, (moves, _, _) in enumerate(read_records(arguments.records)):
+            try:
+                builder.add_game([move for move in moves if move is not None])  # The passes are found again
+            except ValueError as error:
+                print(f"record {game_number}: {error}", file=sys.stderr)
+    if arguments.self_play:
+        builder.add_self_play(arguments.self_play, arguments.depth, seed=arguments.seed)
+    count = builder.write(arguments.output)
+    print(f"{count} positions written to {arguments.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+from bitboard import BitBoard
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND
+import time
+
+# Global constant variable
+
+# Number of empty boxes from which the engine solves the end of the game exactly. Measured times of a solve of the 8x8
+# board on positions reached by random moves: about 0.1 s with 10 empty boxes, 0.5 s with 12, 1 to 4 s with 14,
+# 10 to 15 s with 16 and 90 s with 18, so 20 empty boxes take minutes. A timed search stops the solver at its deadline
+ENDGAME_EMPTIES = 10
+FASTEST_FIRST_EMPTIES = 6   # Above this number of empty boxes, the moves are sorted by opponent mobility
+TABLE_EMPTIES = 6   # The positions with at least this number of empty boxes are saved in the table of the solver
+TABLE_SIZE = 1 << 18    # Maximum number of positions in the table of the solver, it is emptied when it is full
+CLOCK_CHECK_NODES = 256     # A timed search reads the clock once every this number of nodes (see Engine.minimax)
+
+
+# This exception is raised by the searches when they are asked to stop (see Engine.request_stop)
+class SearchCancelled(Exception):
+    pass
+
+
+# This function returns the number of bits set in a bitboard
+def popcount(bits: int):
+    return bin(bits).count("1")
+
+
+# This class solves the end of a game exactly: it searches every move until the end of the game and returns the final
+# disc difference (pieces of the player minus pieces of his opponent) with a perfect play of both players.
+# It works directly on the bitboards of the two players (the player to move first), with a negamax alpha-beta search:
+# the value of a position for a player is the opposite of its value for his opponent.
+# The values found are saved in a table, keyed by the two bitboards: the final disc difference of a position does not
+# depend on the search that reached it, so the table is kept from one solve to the next (see clear).
+class EndgameSolver:
+    def __init__(self, row_count: int, column_count: int):
+        self.row_count = row_count
+        self.column_count = column_count
+        self.bitboard = BitBoard(row_count, column_count, (89, 139, 44), (0, 0))  # Move generation and flips
+        # Regions of the grid (the four quadrants) used by the parity ordering: the last move of an odd region is
+        # usually played by the player who enters it first
+        self.regions = []
+        for top in (0, row_count // 2):
+            for left in (0, column_count // 2):
+                region = 0
+                for row in range(top, top + (row_count + 1) // 2):
+                    for col in range(left, left + (column_count + 1) // 2):
+                        if row < row_count and col < column_count:
+                            region |= 1 << (row * column_count + col)
+                self.regions.append(region)
+        self.nodes_visited = 0  # Number of nodes visited by the last solve
+        self.stop_requested = False     # When set, the search in progress stops with SearchCancelled
+        self.deadline = float('+inf')   # Time (time.perf_counter) when the solve stops with SearchCancelled
+        self.next_clock_check = float('+inf')   # Number of visited nodes at which the deadline is checked again
+        # Values of the positions already solved, by (player bits, opponent bits): (bound, value, best move bit)
+        self.table = {}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Public methods
+
+    # This method returns the bitboards (player, opponent) of a board of any backend
+    def board_bits(self, board, player: int):
+        other_player = 2 if player == 1 else 1
+        if isinstance(board, BitBoard):
+            return board.bits[player], board.bits[other_player]
+        player_bits = 0
+        opponent_bits = 0
+        for row in range(board.row_count):
+            for col in range(board.column_count):
+                if board.grid[row][col] == player:
+                    player_bits |= 1 << (row * board.column_count + col)
+                elif board.grid[row][col] == other_player:
+                    opponent_bits |= 1 << (row * board.column_count + col)
+        return player_bits, opponent_bits
+
+    # This method empties the table of the solved positions
+    def clear(self):
+        self.table.clear()
+
+    # This method solves the position of the player on the board. It returns the best move (row, col) and the final disc
+    # difference for the player, or (None, score) if the player has no available move
+    def solve(self, board, player: int):
+        player_bits, opponent_bits = self.board_bits(board, player)
+        self.nodes_visited = 0
+        # The clock is only read when a deadline is set, the other solves never reach the next check
+        self.next_clock_check = CLOCK_CHECK_NODES if self.deadline < float('+inf') else float('+inf')
+        moves = self.bitboard.moves_bits(player_bits, opponent_bits)
+        if not moves:
+            return None, self.negamax(player_bits, opponent_bits, -self.row_count * self.column_count - 1,
+                                      self.row_count * self.column_count + 1)
+        best_move = None
+        alpha = -self.row_count * self.column_count - 1
+        beta = self.row_count * self.column_count + 1
+        for move_bit, flipped in self.ordered_moves(player_bits, opponent_bits, moves):
+            value = -self.negamax(opponent_bits & ~flipped, player_bits | flipped | move_bit, -beta, -alpha)
+            if value > alpha:
+                alpha = value
+                best_move = divmod(move_bit.bit_length() - 1, self.column_count)
+        return best_move, alpha
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Search methods
+
+    # This method returns the final disc difference of a position for the player to move
+    def final_score(self, player_bits: int, opponent_bits: int):
+        return popcount(player_bits) - popcount(opponent_bits)
+
+    # Implementation of the negamax alpha-beta search until the end of the game. The returned value is the exact score
+    # when it is between alpha and beta, or a bound of it otherwise
+    def negamax(self, player_bits: int, opponent_bits: int, alpha: int, beta: int):
+        self.nodes_visited += 1
+        if self.stop_requested:
+            raise SearchCancelled()
+        if self.nodes_visited >= self.next_clock_check:     # Timed search, it stops once the deadline is over
+            self.next_clock_check = self.nodes_visited + CLOCK_CHECK_NODES
+            if time.perf_counter() > self.deadline:
+                raise SearchCancelled()
+        empty = ~(player_bits | opponent_bits) & self.bitboard.full_mask
+        empty_count = popcount(empty)
+        if empty_count <= 3:    # The last moves are searched without the move generation
+            return self.solve_last_empties(player_bits, opponent_bits, alpha, beta, empty)
+        moves = self.bitboard.moves_bits(player_bits, opponent_bits)
+        if not moves:
+            if not self.bitboard.moves_bits(opponent_bits, player_bits):  # Nobody can play, the game is over
+                return self.final_score(player_bits, opponent_bits)
+            return -self.negamax(opponent_bits, player_bits, -beta, -alpha)  # The player has to pass
+
+        # The positions near the end of the game are too cheap to solve to be worth saving
+        key = (player_bits, opponent_bits) if empty_count >= TABLE_EMPTIES else None
+        hash_move = 0
+        if key is not None:
+            entry = self.table.get(key)
+            if entry is not None:
+                bound, value, hash_move = entry
+                if bound == EXACT or (bound == LOWER_BOUND and value >= beta) or \
+                        (bound == UPPER_BOUND and value <= alpha):
+                    return value
+
+        original_alpha = alpha
+        best_value = -self.row_count * self.column_count - 1
+        best_move = 0
+        for move_bit, flipped in self.ordered_moves(player_bits, opponent_bits, moves, hash_move):
+            next_player_bits, next_opponent_bits = opponent_bits & ~flipped, player_bits | flipped | move_bit
+            if best_move:   # Principal variation search: the first move is expected to be the best one
+                value = -self.negamax(next_player_bits, next_opponent_bits, -alpha - 1, -alpha)
+                if alpha < value < beta:    # Better than expected, it is searched again with the whole window
+                    value = -self.negamax(next_player_bits, next_opponent_bits, -beta, -value)
+            else:
+                value = -self.negamax(next_player_bits, next_opponent_bits, -beta, -alpha)
+            if value > best_value:
+                best_value = value
+                best_move = move_bit
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:   # Cutoff
+                        break
+
+        if key is not None:
+            if len(self.table) >= TABLE_SIZE:   # The memory used never grows over the size of the table
+                self.table.clear()
+            if best_value <= original_alpha:    # Failed low, the value is at most the one found
+                bound = UPPER_BOUND
+            elif best_value >= beta:    # Failed high, the value is at least the one found
+                bound = LOWER_BOUND
+            else:
+                bound = EXACT
+            self.table[key] = (bound, best_value, best_move)
+        return best_value
+
+    # This method returns the moves with the pieces they flip, in the order in which they should be searched: the best
+    # move saved in the table first, then the moves of the regions with an odd number of empty boxes (parity), and when
+    # there are enough empty boxes, the moves leaving the fewest moves to the opponent first (fastest-first), since they
+    # lead to the smallest trees
+    def ordered_moves(self, player_bits: int, opponent_bits: int, moves: int, hash_move: int = 0):
+        empty = ~(player_bits | opponent_bits) & self.bitboard.full_mask
+        odd_regions = 0
+        for region in self.regions:
+            if popcount(empty & region) % 2 == 1:
+                odd_regions |= region
+        fastest_first = popcount(empty) > FASTEST_FIRST_EMPTIES
+        ordered = []
+        while moves:
+            move_bit = moves & -moves
+            moves ^= move_bit
+            flipped = self.bitboard.flips_bits(move_bit, player_bits, opponent_bits)[0]
+            mobility = 0
+            if fastest_first and move_bit != hash_move:
+                opponent_moves = self.bitboard.moves_bits(opponent_bits & ~flipped, player_bits | flipped | move_bit)
+                mobility = popcount(opponent_moves)
+            ordered.append((move_bit != hash_move, mobility, not move_bit & odd_regions, move_bit, flipped))
+        ordered.sort()
+        return [(move_bit, flipped) for _, _, _, move_bit, flipped in ordered]
+
+    # This method solves a position with at most three empty boxes: they are tried directly, in parity order
+    def solve_last_empties(self, player_bits: int, opponent_bits: int, alpha: int, beta: int, empty: int):
+        if empty == 0:
+            return self.final_score(player_bits, opponent_bits)
+        if empty & (empty - 1) == 0:    # Only one empty box
+            return self.solve_last_empty(player_bits, opponent_bits, empty)
+        squares = []
+        while empty:
+            square = empty & -empty
+            empty ^= square
+            squares.append(square)
+        empty = sum(squares)
+        # With three empty boxes, the box alone in its region is played first
+        if len(squares) == 3:
+            squares.sort(key=lambda square: not any(popcount(empty & region) == 1 and square & region
+                                                     for region in self.regions))
+        best_value = None
+        for square in squares:
+            flipped = self.bitboard.flips_bits(square, player_bits, opponent_bits)[0]
+            if flipped:
+                self.nodes_visited += 1
+                value = -self.solve_last_empties(opponent_bits & ~flipped, player_bits | flipped | square,
+                                                 -beta, -alpha, empty ^ square)
+                if best_value is None or value > best_value:
+                    best_value = value
+                    if value > alpha:
+                        alpha = value
+                        if alpha >= beta:   # Cutoff
+                            break
+        if best_value is not None:
+            return best_value
+        # The player has to pass
+        for square in squares:
+            if self.bitboard.flips_bits(square, opponent_bits, player_bits)[0]:
+                return -self.solve_last_empties(opponent_bits, player_bits, -beta, -alpha, empty)
+        return self.final_score(player_bits, opponent_bits)  # Nobody can play, the game is over
+
+    # This method solves a position with only one empty box: the player plays it if he can, otherwise his opponent
+    def solve_last_empty(self, player_bits: int, opponent_bits: int, square: int):
+        player_count = popcount(player_bits)
+        opponent_count = popcount(opponent_bits)
+        flipped = popcount(self.bitboard.flips_bits(square, player_bits, opponent_bits)[0])
+        if flipped:
+            return player_count + flipped + 1 - (opponent_count - flipped)
+        flipped = popcount(self.bitboard.flips_bits(square, opponent_bits, player_bits)[0])
+        if flipped:
+            return player_count - flipped - (opponent_count + flipped + 1)
+        return player_count - opponent_count
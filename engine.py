@@ -0,0 +1,528 @@
+from board import Board, check_board_size, square_weights, starting_boxes
+from bitboard import BitBoard
+from transposition import TranspositionTable, zobrist_keys, EXACT, LOWER_BOUND, UPPER_BOUND
+from batch import evaluate_grids
+from endgame import EndgameSolver, SearchCancelled, ENDGAME_EMPTIES, CLOCK_CHECK_NODES
+from stats import SearchStats
+from pattern import PatternEvaluator
+from symmetry import canonical_form, transform_move, restore_move
+import numpy as np
+import cProfile
+import math
+import time
+
+# Global constant variable
+
+WHITE = 1   # Key of the white player
+BLACK = 2   # Key of the black player (black always starts)
+
+SCREEN_SIZE = (0, 0)    # The boards of the engine are never displayed, they don't need a screen
+
+TRANSPOSITION_TABLE_SIZE = 1 << 16  # Number of buckets of the transposition table (two positions per bucket)
+
+# Time budget (in seconds) of the AI moves for each difficulty of the game: the AI searches deeper and deeper until it
+# is over (see search_timed), so it answers in about the same time in every position
+DIFFICULTY_TIMES = {1: 0.2,     # Easy
+                    2: 0.5,     # Medium
+                    3: 1.5, }   # Hard
+
+EVALUATORS = ("squares",    # Sum of the square weights of the pieces of the player (see board.square_weights)
+              "patterns")   # Sum of the scores of the patterns of the grid (see pattern.py)
+
+BOARD_BACKENDS = {"numpy": Board,   # Logical grid stored in a NumPy array
+                  "bitboard": BitBoard, }   # Logical grid stored in one integer per player
+
+PIECE_CHARACTERS = {"X": BLACK, "*": BLACK, "B": BLACK,  # Characters of a position string, and the piece they mean
+                    "O": WHITE, "W": WHITE,
+                    "-": 0, ".": 0, }
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Notation functions
+
+# This function converts a move (row, col) into its usual name: the column letter then the row number, like "d3"
+def move_to_string(move: (int, int)):
+    return f"{chr(ord('a') + move[1])}{move[0] + 1}"
+
+
+# This function converts the name of a move ("d3") into the move (row, col)
+def string_to_move(text: str):
+    if len(text) < 2 or not text[0].isalpha() or not text[1:].isdigit():
+        raise ValueError(f"invalid move {text!r}")
+    return int(text[1:]) - 1, ord(text[0].lower()) - ord('a')
+
+
+# This function reads a position written as one character per box, row by row (X for black, O for white,
+# - for an empty box), followed by the character of the player to move. It returns the grid and the player to move
+def string_to_position(text: str, row_count: int = 8, column_count: int = 8):
+    characters = "".join(text.split()).upper()  # Whitespaces are allowed anywhere
+    box_count = row_count * column_count
+    if len(characters) != box_count + 1:
+        raise ValueError(f"a position needs {box_count} boxes and the player to move, got {len(characters)} characters")
+    grid = [[0] * column_count for _ in range(row_count)]
+    for index, character in enumerate(characters[:box_count]):
+        if character not in PIECE_CHARACTERS:
+            raise ValueError(f"unknown box character {character!r}")
+        grid[index // column_count][index % column_count] = PIECE_CHARACTERS[character]
+    if PIECE_CHARACTERS.get(characters[-1], 0) == 0:
+        raise ValueError(f"unknown player to move {characters[-1]!r}")
+    return grid, PIECE_CHARACTERS[characters[-1]]
+
+
+# This function writes a board and the player to move in the format read by string_to_position
+def position_to_string(board: Board, player: int):
+    characters = {0: "-", WHITE: "O", BLACK: "X"}
+    boxes = "".join(characters[int(board.grid[row][col])]
+                    for row in range(board.row_count) for col in range(board.column_count))
+    return boxes + " " + characters[player]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# This class is the engine of the game: it creates the boards and searches the best moves. It does not depend on
+# pygame, so it can be used without a screen (see analyse.py) as well as by the Othello game
+class Engine:
+    def __init__(self, row_count: int = 8, column_count: int = 8, backend: str = "bitboard",
+                 table_size: int = TRANSPOSITION_TABLE_SIZE, batch_leaves: bool = None,
+                 endgame_empties: int = ENDGAME_EMPTIES, timed_stats: bool = False, profile_path: str = None,
+                 evaluator: str = "squares", pattern_tables: str = None, symmetric_table: bool = False):
+        check_board_size(row_count, column_count)
+        self.row_count = row_count
+        self.column_count = column_count
+        self.backend = backend  # Name of the board implementation
+        self.board_class = BOARD_BACKENDS[backend]  # Implementation of the logical board (see BOARD_BACKENDS)
+        self.square_weight = square_weights(row_count, column_count)
+        if evaluator not in EVALUATORS:
+            raise ValueError(f"unknown evaluator {evaluator!r}, expected one of {', '.join(EVALUATORS)}")
+        self.evaluator = evaluator  # Name of the evaluation of the leaves (see EVALUATORS)
+        self.pattern_tables = pattern_tables    # File of the pattern tables (see pattern.py), default tables if None
+        self.pattern_evaluator = None
+        if evaluator == "patterns":
+            if pattern_tables is None:
+                self.pattern_evaluator = PatternEvaluator(row_count, column_count)
+            else:
+                self.pattern_evaluator = PatternEvaluator.load(pattern_tables, row_count, column_count)
+
+        # Search parameters (move ordering heuristics of the alpha-beta search)
+        self.killer_moves = {}  # For each depth, the last two moves that produced a cutoff
+        self.history = {}   # For each (player, move), a score that grows every time the move produced a cutoff
+        self.nodes_visited = 0  # Number of nodes visited by the last search
+        # Evaluate the leaves of a node all at once (see evaluate_children). By default it is only done with the NumPy
+        # grids: the bitboards evaluate a single position faster than they can be converted into an array. The batch
+        # evaluation only knows the square weights, so it is never used with the patterns
+        self.batch_leaves = backend == "numpy" if batch_leaves is None else batch_leaves
+        self.batch_leaves = self.batch_leaves and self.pattern_evaluator is None
+        # Positions already searched, kept from one search to the next until clear is called
+        self.transposition_table = TranspositionTable(table_size)
+        _, self.side_keys, self.maximizing_key = zobrist_keys(row_count, column_count)
+        # Save the positions under their canonical form (see symmetry.py), so that the symmetric positions share their
+        # entry. It costs the canonical form of each node, and it is worth it when the same positions come back with
+        # other orientations (the openings are symmetric)
+        self.symmetric_table = symmetric_table
+        # From this number of empty boxes, the game is solved until its end instead of searched with the heuristic
+        self.endgame_empties = endgame_empties
+        self.endgame_solver = EndgameSolver(row_count, column_count)
+
+        # Instrumentation
+        self.stats = SearchStats()  # Statistics of the last search
+        self.search_hooks = []  # Functions called with the statistics at the end of each search
+        self.timed_stats = timed_stats  # Measure the time spent in each part of the searches (slower)
+        self.profile_path = profile_path    # If set, each search runs under cProfile and its profile is saved there
+        # When set, the search in progress stops with SearchCancelled (the searches can run on another thread)
+        self.stop_requested = False
+        self.deadline = float('+inf')   # Time (time.perf_counter) when the timed search in progress stops
+        self.next_clock_check = float('+inf')   # Number of visited nodes at which the deadline is checked again
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Board methods
+
+    # This method creates an empty board of the engine backend
+    def create_board(self, screen_size=SCREEN_SIZE):
+        return self.board_class(self.row_count, self.column_count, (89, 139, 44), screen_size)
+
+    # This method creates a board with the four starting pieces in the centre
+    def new_board(self, screen_size=SCREEN_SIZE):
+        board = self.create_board(screen_size)
+        white_boxes, black_boxes = starting_boxes(self.row_count, self.column_count)
+        for row, col in white_boxes:    # Place the starting pieces
+            board.place_piece(row, col, WHITE)
+        for row, col in black_boxes:
+            board.place_piece(row, col, BLACK)
+        return board
+
+    # This method creates a board from a position string (see string_to_position), and returns it with the player
+    # to move
+    def board_from_string(self, text: str):
+        grid, player = string_to_position(text, self.row_count, self.column_count)
+        board = self.create_board()
+        board.load_grid(grid)
+        return board, player
+
+    # This method plays a list of moves from the starting position, and returns the board and the player to move.
+    # A player without any available move passes. The visit function, if any, is called with the board, the player and
+    # the move before each move is played. A move that is not available raises ValueError
+    def replay_moves(self, moves: list, visit=None):
+        board = self.new_board()
+        player = BLACK
+        for move in moves:
+            board.is_there_valid_move(player, self.other_player(player))
+            if not board.available_moves:   # The player has to pass
+                player = self.other_player(player)
+                board.is_there_valid_move(player, self.other_player(player))
+            if move not in board.available_moves:
+                raise ValueError(f"illegal move {move_to_string(move)}")
+            if visit is not None:
+                visit(board, player, move)
+            board.make_move(move[0], move[1], player)
+            player = self.other_player(player)
+        return board, player
+
+    # This method returns random moves from the starting position, drawn with the generator (a random.Random). They are
+    # drawn in the grid order, so that they are the same on every backend. It stops early when a player has to pass
+    def random_moves(self, plies: int, generator):
+        board = self.new_board()
+        player = BLACK
+        moves = []
+        for _ in range(plies):
+            board.is_there_valid_move(player, self.other_player(player))
+            if not board.available_moves:
+                break
+            move = generator.choice(sorted(board.available_moves))
+            board.make_move(move[0], move[1], player)
+            moves.append(move)
+            player = self.other_player(player)
+        return moves
+
+    # This method prepares a board for the evaluation of the engine: with the patterns, the board keeps its pattern
+    # indexes up to date at each move. It must be called on the boards given to the search (not on the other ones)
+    def attach_evaluator(self, board: Board):
+        if self.pattern_evaluator is not None:
+            self.pattern_evaluator.attach(board)
+
+    # This method returns the key of the opponent of a player
+    def other_player(self, player: int):
+        return BLACK if player == WHITE else WHITE
+
+    # This method forgets the positions searched before, it is used when a new game starts
+    def clear(self):
+        self.transposition_table.clear()
+        self.endgame_solver.clear()
+
+    # This method adds a function called with the statistics (see stats.SearchStats) at the end of each search
+    def add_search_hook(self, hook):
+        self.search_hooks.append(hook)
+
+    # This method removes a search hook
+    def remove_search_hook(self, hook):
+        self.search_hooks.remove(hook)
+
+    # This method asks the search in progress to stop: it raises SearchCancelled as soon as it visits a new node.
+    # The following searches are stopped too, until clear_stop is called
+    def request_stop(self):
+        self.stop_requested = True
+        self.endgame_solver.stop_requested = True
+
+    # This method allows the searches again after request_stop
+    def clear_stop(self):
+        self.stop_requested = False
+        self.endgame_solver.stop_requested = False
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Search methods
+
+    # This method searches the best move of the player on the board, with a minimax search of the given depth
+    # (depth 0 only looks at the moves themselves). The board is not modified.
+    # When there are only a few empty boxes left, the game is solved instead: the value is then the final disc
+    # difference for the player with a perfect play (see endgame.py).
+    # first_move is a move searched first (like the best move of a shallower search), it does not change the result.
+    # It returns the best move (row, col) and its value, or (None, None) if the player has no available move
+    def search(self, board: Board, player: int, depth: int, first_move: (int, int) = None):
+        self.start_search(player, depth)
+        try:
+            if self.profile_path:   # The search is run under the profiler, and its profile replaces the previous one
+                profiler = cProfile.Profile()
+                best_move, max_point = profiler.runcall(self.run_search, board, player, depth, first_move)
+                profiler.dump_stats(self.profile_path)
+            else:
+                best_move, max_point = self.run_search(board, player, depth, first_move)
+        finally:
+            self.stats.release(self)
+        self.stats.finish(best_move, max_point, self.nodes_visited, self.transposition_table.probes,
+                          self.transposition_table.hit_rate())
+        if best_move is not None:
+            self.stats.principal_variation = self.principal_variation(board, player, best_move, depth)
+        for hook in self.search_hooks:
+            hook(self.stats)
+        return best_move, max_point
+
+    # This method searches the best move of the player by iterative deepening: the depths 1, 2, 3... are searched one
+    # after the other until the time limit (in seconds) is over, and the search in progress is then dropped. The best
+    # move of each depth is searched first at the next one, and the transposition table keeps the best moves of the
+    # other positions, so a depth costs little more than a search of this depth alone. The depth 1 is always completed
+    # whatever the time limit, so that there is always a move to play: when it is an endgame solve that does not end in
+    # time, the heuristic search of depth 1 answers instead.
+    # It returns the best move and the value of the last completed depth, and this depth. The statistics are the ones
+    # of this depth. A stop requested with request_stop still raises SearchCancelled
+    def search_timed(self, board: Board, player: int, time_limit: float, max_depth: int = None):
+        start = time.perf_counter()
+        empties = board.count_empties()
+        # A search deeper than the number of empty boxes only reaches the end of the game, like this depth
+        max_depth = empties if max_depth is None else min(max_depth, empties)
+        depth = 1
+        self.deadline = start + time_limit
+        try:
+            try:
+                best_move, max_point = self.search(board, player, 1)
+            except SearchCancelled:
+                if self.stop_requested:
+                    raise
+                self.deadline = float('+inf')
+                endgame_empties = self.endgame_empties
+                self.endgame_empties = -1   # The solve was too long, the heuristic search does not call the solver
+                try:
+                    best_move, max_point = self.search(board, player, 1)
+                finally:
+                    self.endgame_empties = endgame_empties
+                return best_move, max_point, depth
+            stats = self.stats
+            while best_move is not None and not stats.solved and depth < max_depth \
+                    and time.perf_counter() < self.deadline:
+                best_move, max_point = self.search(board, player, depth + 1, best_move)
+                depth += 1
+                stats = self.stats
+        except SearchCancelled:
+            if self.stop_requested:     # Stopped by request_stop, not by the time limit
+                raise
+            self.stats = stats  # The dropped search has its own statistics, the ones of the last depth are kept
+        finally:
+            self.deadline = float('+inf')
+            self.next_clock_check = float('+inf')
+        return best_move, max_point, depth
+
+    # This method does the search of the search method, without the instrumentation
+    def run_search(self, board: Board, player: int, depth: int, first_move: (int, int) = None):
+        if board.count_empties() <= self.endgame_empties:
+            return self.solve_endgame(board, player)
+        # The whole search is done on one copy of the board: the moves are played and undone on it
+        start = time.perf_counter()
+        search_board = board.copy_board(SCREEN_SIZE)
+        self.stats.times["board_copy"] += time.perf_counter() - start
+        self.attach_evaluator(search_board)
+        self.stats.instrument(search_board, self)
+        search_board.is_there_valid_move(player, self.other_player(player))
+        moves = search_board.scan_ordered_moves(player, self.other_player(player))  # Order of the tie-breaks
+        best_move = None
+        best_index = len(moves)   # Index of the best move in the available moves
+        max_point = float('-inf')  # Represent the points of the best found move
+        self.stats.add_node(depth + 1, len(moves))
+        for move in self.order_moves(moves, player, depth + 1, first_move):
+            index = moves.index(move)
+            # Like the original minimax, the first move of the grid scan (see Board.scan_ordered_moves) wins in case of
+            # a tie, whatever the backend. A move that comes before the current best one is searched with a bound just
+            # below max_point so that an equal value is exact
+            if index < best_index:
+                alpha = math.nextafter(max_point, float('-inf'))
+            else:
+                alpha = max_point
+            move_points = self.search_move(search_board, player, move, depth, alpha)
+            if move_points > max_point or (move_points == max_point and index < best_index):
+                max_point = move_points  # Then this move is currently the best that we found, we save it
+                best_move = move
+                best_index = index
+        if best_move is None:  # Not any move has been found
+            return None, None
+        return best_move, max_point
+
+    # This method searches the best move of the player until the end of the game. It returns the best move and the
+    # final disc difference for the player, or (None, None) if the player has no available move
+    def solve_endgame(self, board: Board, player: int):
+        self.endgame_solver.deadline = self.deadline    # A timed search stops the solver too
+        best_move, score = self.endgame_solver.solve(board, player)
+        self.nodes_visited = self.endgame_solver.nodes_visited
+        self.stats.solved = True
+        if best_move is None:
+            return None, None
+        return best_move, score
+
+    # This method prepares the engine for a new search
+    def start_search(self, player: int = None, depth: int = None):
+        self.killer_moves = {}  # The move ordering heuristics are specific to each search
+        self.history = {}
+        self.nodes_visited = 0
+        # The clock is only read by the timed searches, the other ones never reach the next check
+        self.next_clock_check = CLOCK_CHECK_NODES if self.deadline < float('+inf') else float('+inf')
+        self.transposition_table.new_search()
+        self.stats = SearchStats(player, depth, self.timed_stats)
+
+    # This method returns the principal variation of a search: the best move, then the moves expected from both
+    # players, read from the best moves saved in the transposition table
+    def principal_variation(self, board: Board, player: int, best_move: (int, int), depth: int):
+        if self.stats.solved:   # The solver does not save its positions
+            return [best_move]
+        variation_board = board.copy_board(SCREEN_SIZE)
+        variation = [best_move]
+        variation_board.make_move(best_move[0], best_move[1], player)
+        player = self.other_player(player)
+        maximizing_player = False
+        for _ in range(depth):
+            key, transform = self.table_key(variation_board, player, maximizing_player)
+            entry = self.transposition_table.probe(key)
+            if entry is None or entry[4] is None:
+                break
+            move = restore_move(entry[4], transform, self.row_count, self.column_count) if transform else entry[4]
+            variation_board.is_there_valid_move(player, self.other_player(player))
+            if move not in variation_board.available_moves:     # Hash collision
+                break
+            variation.append(move)
+            variation_board.make_move(move[0], move[1], player)
+            player = self.other_player(player)
+            maximizing_player = not maximizing_player
+        return variation
+
+    # This method returns the value of one move of the player at the root of a search. The value is exact if it is
+    # above alpha, otherwise it is only known to be lower than or equal to alpha
+    def search_move(self, search_board: Board, player: int, move: (int, int), depth: int, alpha: float):
+        other_player = self.other_player(player)
+        flipped_coin = search_board.make_move(move[0], move[1], player)  # Simulation of the move
+        search_board.is_there_valid_move(other_player, player)  # Updating of the new available moves
+        move_points = self.minimax(search_board, other_player, False, flipped_coin, depth, alpha, float('+inf'))
+        search_board.unmake_move()  # The move is undone, the board is back to the current position
+        return move_points
+
+    # Implementation of the minimax algorithm with alpha-beta pruning for Othello game
+    # alpha is the value that the maximizing player is already sure to get, beta the one of the minimizing player:
+    # as soon as alpha >= beta, the other moves of the node cannot change the result and are not searched.
+    # The returned value is the minimax value when it is between alpha and beta, or a bound of it otherwise
+    def minimax(self, board: Board, player: int, maximizing_player: int, turned_coin: int, depth: int,
+                alpha: float = float('-inf'), beta: float = float('+inf')):
+        self.nodes_visited += 1
+        if self.stop_requested:
+            raise SearchCancelled()
+        if self.nodes_visited >= self.next_clock_check:     # Timed search, it stops once the deadline is over
+            self.next_clock_check = self.nodes_visited + CLOCK_CHECK_NODES
+            if time.perf_counter() > self.deadline:
+                raise SearchCancelled()
+        other_player = self.other_player(player)    # Define the opponent key
+
+        if depth == 0 or board.available_moves == []:  # If we have a leaf node or the maximum depth is reached
+            self.stats.leaves += 1
+            total = self.evaluate_board(board, player, turned_coin)  # We evaluate the board with the heuristic method
+            return total  # We return the heuristic evaluation of the board
+
+        # The value of a node depends on the position, the player to move, the side of the search and the depth.
+        # Since the leaves are evaluated for the player to move, only a search of the same depth can be reused
+        key, transform = self.table_key(board, player, maximizing_player)
+        entry = self.transposition_table.probe(key)
+        hash_move = None
+        if entry is not None:
+            hash_move = entry[4]    # Best move of a previous search, searched first whatever its depth
+            if transform and hash_move is not None:     # Move of the canonical grid
+                hash_move = restore_move(hash_move, transform, self.row_count, self.column_count)
+            if entry[1] == depth:
+                if entry[2] == EXACT:
+                    return entry[3]
+                elif entry[2] == LOWER_BOUND:
+                    alpha = max(alpha, entry[3])
+                else:
+                    beta = min(beta, entry[3])
+                if alpha >= beta:
+                    return entry[3]
+        alpha_start, beta_start = alpha, beta
+
+        if maximizing_player:  # If we are with the maximizing player
+            best_value = float('-inf')  # We want to find the best node in the possible moves of this board
+        else:  # If we are with the minimizing player
+            best_value = float('+inf')  # We want to find the worth node in the possible moves of this board
+        best_move = None
+        moves = board.available_moves   # The children replace the available moves of the board, we keep them here
+        self.stats.add_node(depth, len(moves))
+        ordered_moves = self.order_moves(moves, player, depth, hash_move)  # Best moves first
+        leaf_values = None
+        if depth == 1 and self.batch_leaves:    # All the children are leaves, they are evaluated at once
+            leaf_values = self.evaluate_children(board, ordered_moves, player)
+        for index, move in enumerate(ordered_moves):
+            if leaf_values is not None:
+                value = leaf_values[index]
+            else:
+                turned_coin = board.make_move(move[0], move[1], player)  # Simulation of the move
+                board.is_there_valid_move(other_player, player)  # Update of the new available moves
+                value = self.minimax(board, other_player, not maximizing_player, turned_coin, depth - 1,
+                                     alpha, beta)  # Minimax process
+                board.unmake_move()     # The move is undone, the board is back to the position of this node
+            if maximizing_player:
+                if value > best_value:  # Is the value of this node the best value that we found
+                    best_value, best_move = value, move
+                alpha = max(alpha, best_value)
+            else:
+                if value < best_value:  # Is the value of this node the worth value that we found
+                    best_value, best_move = value, move
+                beta = min(beta, best_value)
+            if alpha >= beta:  # Cutoff, the opponent will never let the game reach this node
+                self.store_cutoff(move, player, depth)
+                break
+        board.available_moves = moves
+
+        # The value is exact only if it is strictly inside the search window, otherwise it is a bound
+        if best_value <= alpha_start:
+            bound = UPPER_BOUND
+        elif best_value >= beta_start:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        if transform and best_move is not None:
+            best_move = transform_move(best_move, transform, self.row_count, self.column_count)
+        self.transposition_table.store(key, depth, bound, best_value, best_move)
+        return best_value  # We return the best/worth (maximizing/minimazing player) node for this move
+
+    # This method returns the key of a position in the transposition table, for the player to move and the side of the
+    # search. It also returns the transform of the moves saved in the table: with the symmetric table, the key is the
+    # one of the canonical grid and the moves are the ones of the canonical grid, otherwise the transform is 0
+    def table_key(self, board: Board, player: int, maximizing_player: int):
+        side_key = self.side_keys[player] ^ (self.maximizing_key if maximizing_player else 0)
+        if self.symmetric_table:
+            white_bits, black_bits, transform = canonical_form(*board.bitboards(), self.row_count, self.column_count)
+            return hash((white_bits, black_bits)) ^ side_key, transform
+        return board.zobrist_hash ^ side_key, 0
+
+    # This method sorts the moves so that the best ones are searched first, which makes the cutoffs happen earlier:
+    # the best move found by a previous search of the position, the killer moves of this depth, then the moves with
+    # the best history score, then the best squares (the square weights put the corners first and the squares next
+    # to the corners last)
+    def order_moves(self, moves: list, player: int, depth: int, hash_move=None):
+        killers = self.killer_moves.get(depth, [])
+        return sorted(moves, key=lambda move: (move != hash_move,
+                                               move not in killers,
+                                               -self.history.get((player, move), 0),
+                                               -self.square_weight[move[0]][move[1]]))
+
+    # This method saves a move that produced a cutoff in the killer moves and in the history
+    def store_cutoff(self, move: (int, int), player: int, depth: int):
+        killers = self.killer_moves.setdefault(depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]  # We only keep the two last killer moves of each depth
+        self.history[(player, move)] = self.history.get((player, move), 0) + depth * depth
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Evaluation methods
+
+    # This method is a heuristic evaluation method that allow us to put a score for a specific grid
+    # With the patterns, the sum of the square weights is replaced by the score of the patterns
+    def evaluate_board(self, board: Board, player: int, turned_coin: int):
+        if board.patterns is not None:
+            total = board.patterns.score(player) * player
+        else:
+            total = board.weighted_points(player)
+        return total + 1.5 * turned_coin
+
+    # This method evaluates all the positions reached by the moves of the player at once, with the batch evaluation
+    # (see batch.py). It returns the same values as evaluate_board, in the order of the moves
+    def evaluate_children(self, board: Board, moves: list, player: int):
+        grids = np.empty((len(moves), self.row_count, self.column_count))
+        turned_coins = np.empty(len(moves))
+        for index, move in enumerate(moves):
+            turned_coins[index] = board.make_move(move[0], move[1], player)  # Simulation of the move
+            grids[index] = board.grid_array()
+            board.unmake_move()
+        self.nodes_visited += len(moves)
+        self.stats.leaves += len(moves)
+        return evaluate_grids(grids, self.other_player(player), turned_coins, self.square_weight).tolist()
@@ -1,6 +1,7 @@
 from othello import Othello    # importing the Game Class from the file
 
-ROW_COUNT = 8
+ROW_COUNT = 8   # Even numbers of rows and columns from 6 to 16, see board.check_board_size
 COLUMN_COUNT = 8
+BOARD_BACKEND = "bitboard"  # "numpy" or "bitboard", see engine.BOARD_BACKENDS
 
-othello = Othello(ROW_COUNT, COLUMN_COUNT)
+othello = Othello(ROW_COUNT, COLUMN_COUNT, BOARD_BACKEND)
@@ -1,13 +1,31 @@
 import pygame
 from button import Button
-from board import Board
+from engine import Engine, DIFFICULTY_TIMES
+from board import starting_boxes
+from book import OpeningBook
+from worker import SearchWorker
+from records import append_game
 import webbrowser
+import logging
+import os
 import sys
 
 RULES_URL = "https://www.worldothello.org/about/about-othello/othello-rules/official-rules/english"
 
 SCREEN_SIZE = (1000, 600)
 
+BOOK_PATH = "assets/book.bin"   # Opening book used by the AI if the file exists (see book.py)
+
+RECORDS_PATH = "records/games.bin"  # Archive where every finished 8x8 game is appended (see records.py)
+SIZED_RECORDS_PATH = "records/games-{}x{}.bin"  # Archive of the games of the other board sizes
+
+MAX_AI_DEPTH = 60   # Deepest search of the AI, the time budget is always over before on the usual positions
+
+AI_DELAY = 500  # Minimum time (in milliseconds) before the move of the AI is shown
+FRAME_RATE = 60     # Maximum number of iterations of the game loop per second, the AI searches in the meantime
+
+logger = logging.getLogger("othello")
+
 GAME_STATES = {"LAUNCHING": 'launching',
                "PLAYING": 'playing',
                "ENDING": 'ending',
@@ -18,7 +36,7 @@ GAME_STATES = {"LAUNCHING": 'launching',
 
 
 class Othello:  # Class representing the functioning of the game of Othello
-    def __init__(self, row_count, column_count):
+    def __init__(self, row_count, column_count, backend="bitboard", pondering=True):
         # Game parameters
         # Players
         self.players = {
@@ -30,6 +48,7 @@ class Othello:  # Class representing the functioning of the game of Othello
         self.game_state = GAME_STATES["LAUNCHING"]
         self.ai_start = False
         self.difficulty = 1   # Default difficulty is easy (1 = easy, 2 = medium, 3 = hard)
+        self.game_moves = []    # Moves of the game in progress (None for a pass), saved in RECORDS_PATH at its end
 
         # Buttons
         self.buttons = {
@@ -50,14 +69,31 @@ class Othello:  # Class representing the functioning of the game of Othello
         # Creating board
         self.row_count = row_count
         self.column_count = column_count
-        self.board = Board(self.row_count, self.column_count, (89, 139, 44), SCREEN_SIZE)
+        self.engine = Engine(self.row_count, self.column_count, backend)  # Board logic and AI search
+        self.board = self.engine.create_board(SCREEN_SIZE)
+        self.book = OpeningBook(BOOK_PATH) if os.path.exists(BOOK_PATH) else None  # Opening moves of the AI
+
+        # AI searches, done on a background thread while the game keeps handling the events
+        self.worker = SearchWorker(self.engine, self.book)
+        self.ai_task = None     # Search of the move of the AI in progress
+        self.ai_turn_start = 0  # Time (in milliseconds) when the AI turn started
+        self.ai_delay = AI_DELAY    # Minimum duration of the AI turn in progress
+        # While the user is thinking, the AI searches its answer to the move that it expects from him
+        self.pondering = pondering
+        self.ponder_task = None     # Search of the answer to the expected move of the user
 
         # Initialisation of the game
         # Creation of the screen
         pygame.init()
         screen = pygame.display.set_mode(SCREEN_SIZE)
         self.font = pygame.font.Font(pygame.font.get_default_font(), 40)
+        # Surfaces prepared once, so that the display never reads a file or renders a text during the game
+        self.backgrounds = self.load_backgrounds()  # Background of each game state
+        self.digit_glyphs = self.render_digit_glyphs()  # Rendered digits of the scores, for each color
+        self.dirty_rects = []   # Areas of the screen drawn since the last display update
+        self.score_widths = {}  # Width of the last score shown for each player, from the left side of its erased area
         pygame.display.set_caption('Abalone')
+        self.clock = pygame.time.Clock()
         # Launching of the game
         self.update_background(screen)
         self.launching_othello(screen)
@@ -100,6 +136,7 @@ class Othello:  # Class representing the functioning of the game of Othello
         while True:  # Global loop for the game's process
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:  # Quit the game
+                    self.worker.close()
                     pygame.quit()
                     sys.exit()
                 if event.type == pygame.MOUSEBUTTONDOWN:  # Click are used to play and place your coin
@@ -115,24 +152,29 @@ class Othello:  # Class representing the functioning of the game of Othello
                         self.difficulty = 2
                     elif self.buttons["hard_diff_button"].is_clicked(mouse_position):  # Difficulty changes to hard
                         self.difficulty = 3
+                    elif self.ai_task is not None:  # The user cannot play while the AI is searching its move
+                        pass
                     elif self.board.is_clicked(mouse_position):  # Check If the click is inside the board
                         if self.play_user(mouse_position, screen):  # Play if the move is allowed
                             self.display_available_move(screen, self.current_player)
                             self.next_turn(screen)
                             self.show_score(screen)
                             self.is_game_ended(screen)
-                            pygame.display.update()  # Updating screen display because AI has to play
-                            self.AI_turn(screen)    # AI turn process
-                            self.is_game_ended(screen)
-                pygame.display.update()
+                            self.refresh_display()  # Updating screen display because AI has to play
+                            self.AI_turn(screen)    # AI turn process, the move is searched in the background
+            if self.ai_task is not None:    # Is the move of the AI found
+                self.poll_AI(screen)
+            self.refresh_display()  # Only the areas drawn during this iteration are updated
+            self.clock.tick(FRAME_RATE)     # The game loop waits, so that the search of the AI gets the processor
 
     # This method is the main user turn process. We manage a verification process and the modification of the board
     def play_user(self, mouse_position: (float, float), screen: pygame.Surface):
         column_click, row_click = self.convert_click_to_position(mouse_position)  # We convert the click in a position
         if (row_click, column_click) in self.board.available_moves:  # If the move is available
-            self.board.grid[row_click][column_click] = self.current_player
+            self.board.place_piece(row_click, column_click, self.current_player)
             self.board.update_grid(row_click, column_click, self.current_player)
-            self.update_board_display(screen)
+            self.game_moves.append((row_click, column_click))
+            self.update_board_display(screen, (row_click, column_click))
             return True  # Move done with success
         return False  # Move invalid
 
@@ -146,6 +188,7 @@ class Othello:  # Class representing the functioning of the game of Othello
             self.game_state = GAME_STATES["PBLACKWON"]
         else:  # Calculate if nobody won because of a draw
             self.game_state = GAME_STATES["DRAW"]
+        self.record_game(black_player_score, white_player_score)
         self.update_background(screen)  # Updating to the good ending page depending on the result of the game
         while True:  # Ending game process, allowing the user to review or to reset the game
             for event in pygame.event.get():
@@ -162,70 +205,83 @@ class Othello:  # Class representing the functioning of the game of Othello
     # ------------------------------------------------------------------------------------------------------------------
     # AI implementation methods
 
-    # This method manages the AI turn process
+    # This method starts the AI turn process: the move is searched in the background (book move or minimax search),
+    # and the game loop polls the search with poll_AI. If the AI already searched this position while the user was
+    # thinking, its move is shown at once
     def AI_turn(self, screen):
-        pygame.time.wait(500)
-        self.play_AI()  # AI playing process, using minimax algorithm
+        key = (self.board.zobrist_hash, self.current_player, MAX_AI_DEPTH, DIFFICULTY_TIMES[self.difficulty])
+        self.ai_turn_start = pygame.time.get_ticks()
+        if self.ponder_task is not None and self.ponder_task.key == key:    # The user played the expected move
+            self.ai_task = self.ponder_task
+            self.ai_delay = 0
+        else:
+            if self.ponder_task is not None:    # The search of the expected move is useless, it is stopped
+                self.worker.cancel(self.ponder_task, wait=False)
+            self.ai_task = self.worker.submit(self.board, self.current_player, MAX_AI_DEPTH,
+                                              time_limit=DIFFICULTY_TIMES[self.difficulty])
+            self.ai_delay = AI_DELAY
+        self.ponder_task = None
+
+    # This method is called by the game loop during the AI turn: when the move is found, it is played and shown
+    def poll_AI(self, screen):
+        if not self.ai_task.is_done() or pygame.time.get_ticks() - self.ai_turn_start < self.ai_delay:
+            return
+        task = self.ai_task
+        self.ai_task = None
+        if task.cancelled and task.error is None:   # The search was stopped, the move is searched again
+            self.AI_turn(screen)
+            return
+        best_move = task.best_move
+        # When the search failed, the error is logged and the game goes on with the first available move of the AI,
+        # instead of closing the window. The AI only passes when it has no move
+        if task.error is not None:
+            logger.error("the AI search failed, the first available move is played", exc_info=task.error)
+            best_move = self.board.available_moves[0] if self.board.available_moves else None
+        elif best_move is None and self.board.available_moves:
+            logger.error("the AI search found no move among %s, the first one is played", self.board.available_moves)
+            best_move = self.board.available_moves[0]
+        self.play_AI(best_move)  # AI playing process, using minimax algorithm
         self.display_available_move(screen, self.current_player)
-        self.update_board_display(screen)
+        if best_move is not None:
+            self.update_board_display(screen, best_move)
         self.next_turn(screen)
         self.show_score(screen)
-        pygame.display.update()
-
-    # This method is the main AI turn process. We manage the selection of the move and the modification of the board
-    def play_AI(self):
-        if self.current_player == self.players["white_player"]["key"]:
-            other_player = self.players["black_player"]["key"]
-        else:
-            other_player = self.players["white_player"]["key"]
-        best_move = [-1, -1]  # Default best move, allow us to know if the minimax algorithm doesn't work
-        max_point = float('-inf')  # Represent the points of the best found move
-        for move in self.board.available_moves:
-            temp_board = self.board.copy_board(SCREEN_SIZE)  # We copy the board because we want to simulate moves
-            temp_board.grid[move[0]][move[1]] = self.current_player  # Simulation of one of the available move
-            flipped_coin = temp_board.update_grid(move[0], move[1], self.current_player)  # How many coin did it flipped
-            temp_board.is_there_valid_move(other_player, self.current_player)  # Updating of the new available moves
-            move_points = self.minimax(temp_board, other_player, False, flipped_coin, depth=self.difficulty)
-            if move_points > max_point:
-                max_point = move_points  # Then this move is currently the best that we found, we save it
-                best_move = move
-        if best_move != [-1, -1]:  # If we have found a move
-            self.board.grid[best_move[0]][best_move[1]] = self.current_player  # Modification of the board
+        self.refresh_display()
+        self.is_game_ended(screen)
+        if self.pondering:
+            self.start_pondering(task.principal_variation)
+
+    # This method starts the search of the answer of the AI to the move expected from the user, the second move of the
+    # principal variation of the last AI search
+    def start_pondering(self, principal_variation: list):
+        if len(principal_variation) < 2 or principal_variation[1] not in self.board.available_moves:
+            return
+        expected_move = principal_variation[1]
+        ponder_board = self.board.copy_board(SCREEN_SIZE)
+        ponder_board.place_piece(expected_move[0], expected_move[1], self.current_player)
+        ponder_board.update_grid(expected_move[0], expected_move[1], self.current_player)
+        ai_player = self.players["white_player"]["key"] if self.players["white_player"]["AI"] \
+            else self.players["black_player"]["key"]
+        self.ponder_task = self.worker.submit(ponder_board, ai_player, MAX_AI_DEPTH, ponder=True,
+                                              time_limit=DIFFICULTY_TIMES[self.difficulty])
+
+    # This method stops the searches of the AI, it is used when the game is reset
+    def cancel_AI(self):
+        for task in (self.ai_task, self.ponder_task):
+            if task is not None:
+                self.worker.cancel(task)
+        self.ai_task = None
+        self.ponder_task = None
+
+    # This method plays the move found by the AI. We manage the modification of the board
+    def play_AI(self, best_move):
+        self.game_moves.append(best_move)   # None if the AI has to pass
+        if best_move is not None:  # If we have found a move
+            self.board.place_piece(best_move[0], best_move[1], self.current_player)  # Modification of the board
             self.board.update_grid(best_move[0], best_move[1], self.current_player)  # Updating of the board
             return True
         return False  # Not any move has been found
 
-    # Implementation of the minimax algorithm for Othello game
-    def minimax(self, board: Board, player: int, maximizing_player: int, turned_coin: int, depth: int):
-        if player == self.players["white_player"]["key"]:  # Define the opponent key
-            other_player = self.players["black_player"]["key"]
-        else:
-            other_player = self.players["white_player"]["key"]
-
-        if depth == 0 or board.available_moves == []:  # If we have a leaf node or the maximum depth is reached
-            total = self.evaluate_board(board, player, turned_coin)  # We evaluate the board with the heuristic method
-            return total  # We return the heuristic evaluation of the board
-
-        if maximizing_player:  # If we are with the maximizing player
-            best_value = float('-inf')  # We want to find the best node in the possible moves of this board
-            for move in board.available_moves:  # We process all the possible moves
-                temp_board = board.copy_board(SCREEN_SIZE)  # We copy the board because we want to simulate the move
-                temp_board.grid[move[0]][move[1]] = player  # Simulation of the move
-                turned_coin = temp_board.update_grid(move[0], move[1], player)  # How many coin did it flipped
-                temp_board.is_there_valid_move(other_player, player)  # Update of the new available moves
-                value = self.minimax(temp_board, other_player, False, turned_coin, depth - 1)  # Minimax process
-                best_value = max(best_value, value)  # Is the value of this node the best value that we found
-        else:  # If we are with the minimizing player
-            best_value = float('+inf')  # We want to find the worth node in the possible moves of this board
-            for move in board.available_moves:  # We process all the possible moves
-                temp_board = board.copy_board(SCREEN_SIZE)  # We copy the board because we want to simulate the move
-                temp_board.grid[move[0]][move[1]] = player  # Simulation of the move
-                turned_coin = temp_board.update_grid(move[0], move[1], player)  # How many coin did it flipped
-                temp_board.is_there_valid_move(other_player, player)  # Update the new available moves
-                value = self.minimax(temp_board, other_player, True, turned_coin, depth - 1)  # Minimax process
-                best_value = min(best_value, value)  # Is the value of this node the worth value that we found
-        return best_value  # We return the best/worth (maximizing/minimazing player) node for this move
-
     # ------------------------------------------------------------------------------------------------------------------
     # Control and interruption methods
 
@@ -235,12 +291,26 @@ class Othello:  # Class representing the functioning of the game of Othello
             self.game_state = GAME_STATES["ENDING"]
             self.ending_othello(screen)
 
+    # This method appends the moves of the finished game to the game archive
+    def record_game(self, black_score: int, white_score: int):
+        path = RECORDS_PATH
+        if (self.row_count, self.column_count) != (8, 8):
+            path = SIZED_RECORDS_PATH.format(self.row_count, self.column_count)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            append_game(path, self.game_moves, black_score, white_score, self.row_count, self.column_count)
+        except (OSError, ValueError) as error:  # The game can go on without its record
+            print(f"The game could not be recorded: {error}", file=sys.stderr)
+
     # This method resets the game and brings back to the launching page
     def reset_game(self, screen: pygame.Surface):
+        self.cancel_AI()    # The searches of the AI are stopped before its engine is cleared
         self.current_player = self.players["black_player"]["key"]  # White always starts
         self.game_state = GAME_STATES["LAUNCHING"]
         self.update_background(screen)
-        self.board = Board(self.row_count, self.column_count, (89, 139, 44), SCREEN_SIZE)  # New board
+        self.board = self.engine.create_board(SCREEN_SIZE)  # New board
+        self.game_moves = []
+        self.engine.clear()    # The positions searched during the previous game are useless
         self.launching_othello(screen)
 
     # This method allows the user to review the previous game, and then to reset it
@@ -279,31 +349,32 @@ class Othello:  # Class representing the functioning of the game of Othello
     def init_game_background(self, screen: pygame.Surface):
         self.update_background(screen)  # Updating the background
         self.display_user_color(screen)  # Show the user main color to remind it to him
-        self.board.grid[3][3] = self.players["white_player"]["key"]  # Place the starting pieces
-        self.board.grid[4][4] = self.players["white_player"]["key"]  # Place the starting pieces
-        self.board.grid[4][3] = self.players["black_player"]["key"]  # Place the starting pieces
-        self.board.grid[3][4] = self.players["black_player"]["key"]  # Place the starting pieces
+        white_boxes, black_boxes = starting_boxes(self.row_count, self.column_count)  # Centre of the grid
+        for player, boxes in (("white_player", white_boxes), ("black_player", black_boxes)):
+            for row, col in boxes:
+                self.board.place_piece(row, col, self.players[player]["key"])  # Place the starting pieces
         self.draw_grid(screen)  # Draw the grid on the screen
         # This section has the same goal as self.update_board_display. However, we don't have to analyse all the grid
-        self.draw_circle(3, 3, screen, self.players["white_player"]["color"], self.board.radius)
-        self.draw_circle(4, 4, screen, self.players["white_player"]["color"], self.board.radius)
-        self.draw_circle(4, 3, screen, self.players["black_player"]["color"], self.board.radius)
-        self.draw_circle(3, 4, screen, self.players["black_player"]["color"], self.board.radius)
+        for player, boxes in (("white_player", white_boxes), ("black_player", black_boxes)):
+            for row, col in boxes:
+                self.draw_circle(col, row, screen, self.players[player]["color"], self.board.radius)
         self.change_player_indicator(screen)  # Let's build the player display indicator
         pygame.display.update()
+        self.dirty_rects = []   # The whole screen has just been updated
 
     # This method changes the player indicator circle that it display on the top right of the screen
     def change_player_indicator(self, screen: pygame.Surface):
         if self.current_player == self.players["white_player"]["key"]:  # If the current player is the white player
-            pygame.draw.circle(screen, self.players["white_player"]["color"],
-                               (105,
-                                117),
-                               self.board.radius * 1.25)
+            indicator = pygame.draw.circle(screen, self.players["white_player"]["color"],
+                                           (105,
+                                            117),
+                                           self.board.radius * 1.25)
         else:  # If the current player is the black player
-            pygame.draw.circle(screen, self.players["black_player"]["color"],
-                               (105,
-                                117),
-                               self.board.radius * 1.25)
+            indicator = pygame.draw.circle(screen, self.players["black_player"]["color"],
+                                           (105,
+                                            117),
+                                           self.board.radius * 1.25)
+        self.dirty_rects.append(indicator)
 
     # This method displays the user color on the right part of the board in order to remind it to him during the game
     def display_user_color(self, screen: pygame.Surface):
@@ -354,81 +425,91 @@ class Othello:  # Class representing the functioning of the game of Othello
         self.board.available_moves = []  # Then, we delete all the current available moves
 
     # This method update the board while creating circle of the good color
-    def update_board_display(self, screen: pygame.Surface):
-        for row in range(self.row_count):
-            for col in range(self.column_count):
-                if self.board.grid[row][col] == self.players["white_player"]["key"]:
-                    self.draw_circle(col, row, screen, self.players["white_player"]["color"], self.board.radius)
-                elif self.board.grid[row][col] == self.players["black_player"]["key"]:
-                    self.draw_circle(col, row, screen, self.players["black_player"]["color"], self.board.radius)
+    # After a move, only the played box and the flipped pieces are drawn again, otherwise the whole board is drawn
+    def update_board_display(self, screen: pygame.Surface, move: (int, int) = None):
+        if move is None:
+            boxes = [(row, col) for row in range(self.row_count) for col in range(self.column_count)]
+        else:
+            boxes = [move] + self.board.flipped_boxes()
+        for row, col in boxes:
+            if self.board.grid[row][col] == self.players["white_player"]["key"]:
+                self.draw_circle(col, row, screen, self.players["white_player"]["color"], self.board.radius)
+            elif self.board.grid[row][col] == self.players["black_player"]["key"]:
+                self.draw_circle(col, row, screen, self.players["black_player"]["color"], self.board.radius)
 
     # This method shows the score of the game on the left part of the screen
+    # The erased area is as wide as the last score and the new one (the large boards have scores of three digits)
     def show_score(self, screen):
-        pygame.draw.rect(screen, (198, 184, 168), (48, 285, 50, 50))    # Use to erase last score display
-        pygame.draw.rect(screen, (198, 184, 168), (125, 285, 50, 50))   # Use to erase last score display
-        white_score = self.font.render(
-            str(self.board.count_points(self.players["white_player"]["key"])),
-            True,
-            (255, 255, 255)
-        )
-        black_score = self.font.render(
-            str(self.board.count_points(self.players["black_player"]["key"])),
-            True,
-            (0, 0, 0)
-        )
-        screen.blit(white_score, (50, 285))
-        screen.blit(black_score, (125, 285))
+        for name, erase_x, position in (("white_player", 48, (50, 285)), ("black_player", 125, (125, 285))):
+            number = self.board.count_points(self.players[name]["key"])
+            color = self.players[name]["color"]
+            width = position[0] - erase_x + self.number_width(number, color)
+            erase_width = max(50, width, self.score_widths.get(name, 0))
+            self.score_widths[name] = width
+            self.dirty_rects.append(pygame.draw.rect(screen, (198, 184, 168), (erase_x, 285, erase_width, 50)))
+            self.draw_number(screen, number, color, position)
+
+    # This method returns the width of a number drawn with the rendered digits of its color
+    def number_width(self, number: int, color: (int, int, int)):
+        return sum(self.digit_glyphs[color][digit].get_width() for digit in str(number))
+
+    # This method draws a number with the rendered digits of its color (see render_digit_glyphs)
+    def draw_number(self, screen: pygame.Surface, number: int, color: (int, int, int), position: (int, int)):
+        x, y = position
+        for digit in str(number):
+            glyph = self.digit_glyphs[color][digit]
+            screen.blit(glyph, (x, y))
+            x += glyph.get_width()
 
     # This method updates game's background using the global state of the game
     def update_background(self, screen: pygame.Surface):
-        fond = pygame.image.load(f'assets/{self.game_state}_background.png')
-        fond = fond.convert()
-        screen.blit(fond, (0, 0))
+        screen.blit(self.backgrounds[self.game_state], (0, 0))
         pygame.display.flip()
-        pygame.display.update()
+        self.dirty_rects = []   # The whole screen has just been updated
+
+    # This method updates the areas of the screen drawn since the last update, and only them
+    def refresh_display(self):
+        if self.dirty_rects:
+            pygame.display.update(self.dirty_rects)
+            self.dirty_rects = []
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Display preparation methods
+
+    # This method loads the background of each game state, once for the whole game
+    def load_backgrounds(self):
+        backgrounds = {}
+        for game_state in GAME_STATES.values():
+            path = f'assets/{game_state}_background.png'
+            if os.path.exists(path):    # The ending state has no background, the result states have one
+                backgrounds[game_state] = pygame.image.load(path).convert()
+        return backgrounds
+
+    # This method renders the ten digits in the colors of the scores
+    def render_digit_glyphs(self):
+        return {color: {digit: self.font.render(digit, True, color) for digit in "0123456789"}
+                for color in ((255, 255, 255), (0, 0, 0))}
 
     # ------------------------------------------------------------------------------------------------------------------
     # Tool methods
 
     # This method is a shortcut to draw a circle at a specific (row, column) quickly
+    # The drawn area is saved, to be updated on the screen by refresh_display
     def draw_circle(self, col: int, row: int, screen: pygame.Surface, color: (int, int, int), radius: int):
-        pygame.draw.circle(screen, color,
-                           (self.board.left_board_side + col * self.board.box_size * 1.03 + self.board.box_size // 2,
-                            self.board.top_board_side + self.board.box_size * row * 1.03 + self.board.box_size // 2),
-                           radius)
+        self.dirty_rects.append(pygame.draw.circle(
+            screen, color,
+            (self.board.left_board_side + col * self.board.box_size * 1.03 + self.board.box_size // 2,
+             self.board.top_board_side + self.board.box_size * row * 1.03 + self.board.box_size // 2),
+            radius))
 
     # This method convert a click in a tuple integer that represent the position of the click in the grid
     def convert_click_to_position(self, mouse_position: (float, float)):
         column_click = (mouse_position[0] - self.board.left_board_side) / self.board.box_size / 1.03
-        column_click = self.round_click_pos(column_click)
+        column_click = self.round_click_pos(column_click, self.column_count)
         row_click = (mouse_position[1] - self.board.top_board_side) / self.board.box_size / 1.03
-        row_click = self.round_click_pos(row_click)
+        row_click = self.round_click_pos(row_click, self.row_count)
         return column_click, row_click
 
-    def round_click_pos(self, x):  # This function convert a float into an integer by truncating at the unit
-        if x < 1:
-            x = 0
-        elif x < 2:
-            x = 1
-        elif x < 3:
-            x = 2
-        elif x < 4:
-            x = 3
-        elif x < 5:
-            x = 4
-        elif x < 6:
-            x = 5
-        elif x < 7:
-            x = 6
-        else:
-            x = 7
-        return x
-
-    # This method is a heuristic evaluation method that allow us to put a score for a specific grid
-    def evaluate_board(self, board, player, turned_coin):
-        total = 0
-        for row in range(board.row_count):
-            for col in range(board.column_count):
-                if board.grid[row][col] == player:
-                    total += board.grid[row][col] * board.square_weight[row][col]
-        return total + 1.5 * turned_coin
\ No newline at end of file
+    # This function convert a float into an integer by truncating at the unit, inside the count of rows or columns
+    def round_click_pos(self, x, count: int):
+        return min(max(int(x), 0), count - 1)
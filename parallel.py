@@ -0,0 +1,94 @@
+from engine import Engine, SCREEN_SIZE, position_to_string
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import math
+import os
+import time
+
+# Parallel search of the root moves: each available move of the position is searched by a worker process with its own
+# engine. The workers share the best value found so far, which is used as the alpha bound of the next moves.
+
+# Global variables of each worker process, set by init_worker
+worker_engine = None
+shared_best_value = None
+
+
+# This function is called once in each worker process, it creates the engine of the worker
+def init_worker(row_count: int, column_count: int, backend: str, evaluator: str, pattern_tables: str, best_value):
+    global worker_engine, shared_best_value
+    worker_engine = Engine(row_count, column_count, backend, evaluator=evaluator, pattern_tables=pattern_tables)
+    shared_best_value = best_value
+
+
+# This function is executed by a worker: it searches one root move of a position and returns its value and the number
+# of visited nodes. The value is exact if it is at least the shared best value read at the beginning of the search,
+# because the bound used is just below it, so that equal values (ties) are exact too
+def search_root_move(position: str, move: (int, int), depth: int):
+    board, player = worker_engine.board_from_string(position)
+    worker_engine.attach_evaluator(board)
+    worker_engine.start_search()
+    alpha = math.nextafter(shared_best_value.value, float('-inf'))
+    value = worker_engine.search_move(board, player, move, depth, alpha)
+    if value > alpha:  # Exact value, it can be shared with the other workers
+        with shared_best_value.get_lock():
+            shared_best_value.value = max(shared_best_value.value, value)
+    return move, value, worker_engine.nodes_visited
+
+
+# This class searches the root moves of a position in parallel, on a pool of worker processes
+class ParallelSearch:
+    def __init__(self, engine: Engine, workers: int = None):
+        self.engine = engine    # Engine used to generate and order the root moves
+        self.workers = workers or os.cpu_count()  # Number of worker processes
+        self.nodes_visited = 0  # Number of nodes visited by the last search, summed over the workers
+        self.best_value = multiprocessing.Value('d', float('-inf'))  # Best exact value found by the workers
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                            initargs=(engine.row_count, engine.column_count, engine.backend,
+                                                      engine.evaluator, engine.pattern_tables, self.best_value))
+
+    # This method searches the best move of the player on the board, like Engine.search. It returns the same move and
+    # value as the serial search: in case of a tie, the first move of the grid scan wins
+    def search(self, board, player: int, depth: int):
+        if board.count_empties() <= self.engine.endgame_empties:  # The end of the game is solved by the engine itself
+            return self.engine.solve_endgame(board, player)
+        search_board = board.copy_board(SCREEN_SIZE)
+        search_board.is_there_valid_move(player, self.engine.other_player(player))
+        moves = search_board.scan_ordered_moves(player, self.engine.other_player(player))  # Order of the tie-breaks
+        if not moves:   # Not any move has been found
+            return None, None
+        self.best_value.value = float('-inf')
+        position = position_to_string(search_board, player)
+        futures = [self.executor.submit(search_root_move, position, move, depth)
+                   for move in self.engine.order_moves(moves, player, depth + 1)]  # Best moves are started first
+        best_move = None
+        max_point = float('-inf')
+        self.nodes_visited = 0
+        for future in as_completed(futures):
+            move, value, nodes = future.result()
+            self.nodes_visited += nodes
+            # A value that is not exact is lower than the best value, it is never selected
+            if best_move is None or value > max_point or \
+                    (value == max_point and moves.index(move) < moves.index(best_move)):
+                max_point = value
+                best_move = move
+        return best_move, max_point
+
+    # This method compares the parallel search with the serial search of the engine on the same position, and returns
+    # the time of both searches, the speedup and whether they found the same move
+    def compare_with_serial(self, board, player: int, depth: int):
+        self.engine.clear()  # The serial search must not take advantage of a previous search
+        start = time.perf_counter()
+        serial_move, serial_value = self.engine.search(board, player, depth)
+        serial_time = time.perf_counter() - start
+        start = time.perf_counter()
+        parallel_move, parallel_value = self.search(board, player, depth)
+        parallel_time = time.perf_counter() - start
+        return {"serial_time": serial_time,
+                "parallel_time": parallel_time,
+                "speedup": serial_time / parallel_time if parallel_time else float('inf'),
+                "same_move": serial_move == parallel_move and serial_value == parallel_value,
+                "workers": self.workers}
+
+    # This method stops the worker processes
+    def close(self):
+        self.executor.shutdown()
@@ -0,0 +1,261 @@
+from board import SQUARE_WEIGHTS
+import numpy as np
+import argparse
+import math
+import sys
+
+# Pattern evaluation: the grid is cut in patterns (the edges, the other lines, the diagonals and the corners). The
+# content of each pattern, read from the point of view of a player, is a base 3 number (0 empty box, 1 piece of the
+# player, 2 piece of his opponent) used as the index of a table of scores. The patterns that are symmetric images of
+# each other share the same table. The evaluation of a position is the sum of the scores of its patterns.
+#
+# The default tables give the same evaluation as the square weights (the sum of the weights of the pieces of the
+# player), so the engine plays the same moves with them. Better tables are fitted from recorded games:
+#
+#   python pattern.py records/games.bin patterns.npz
+#
+# and used with Engine(evaluator="patterns", pattern_tables="patterns.npz").
+
+# Global constant variable
+
+PATTERN_SHAPES = {  # Boxes (row, col) of one pattern of each class, the other ones are its symmetric images
+    "edge": [(0, col) for col in range(8)],
+    "line2": [(1, col) for col in range(8)],
+    "line3": [(2, col) for col in range(8)],
+    "line4": [(3, col) for col in range(8)],
+    "diagonal": [(index, index) for index in range(8)],
+    "corner": [(row, col) for row in range(3) for col in range(3)],
+}
+
+DIGITS = [None,  # Base 3 digit of a box for each point of view (player key), indexed by the key of the box
+          [0, 1, 2],    # White point of view
+          [0, 2, 1]]    # Black point of view
+
+DEFAULT_SCALE = 12  # The table values are the scores multiplied by this, so that the default tables hold integers
+
+
+# This function returns the 8 symmetric images (rotations and reflections) of a box of a square grid of the given size
+def symmetric_boxes(row: int, col: int, size: int):
+    last = size - 1
+    return [(row, col), (col, last - row), (last - row, last - col), (last - col, row),
+            (col, row), (row, last - col), (last - col, last - row), (last - row, col)]
+
+
+# This function returns the patterns of the grid: for each pattern, its class and the indexes of its boxes in the
+# order of their digits. The patterns of a class are the distinct symmetric images of its shape
+def pattern_instances(row_count: int = 8, column_count: int = 8):
+    if (row_count, column_count) != (8, 8):
+        raise ValueError(f"the pattern evaluation only supports the 8x8 board, not {row_count}x{column_count}")
+    instances = []
+    for name, shape in PATTERN_SHAPES.items():
+        seen = set()
+        for transform in range(8):
+            boxes = [symmetric_boxes(row, col, row_count)[transform] for row, col in shape]
+            indexes = tuple(row * column_count + col for row, col in boxes)
+            if frozenset(indexes) not in seen:
+                seen.add(frozenset(indexes))
+                instances.append((name, indexes))
+    return instances
+
+
+# This function returns the default tables: the score of a pattern is the sum of the square weights of the pieces of
+# the player, each weight being divided by the number of patterns that hold its box (times DEFAULT_SCALE)
+def default_tables(row_count: int = 8, column_count: int = 8):
+    instances = pattern_instances(row_count, column_count)
+    weights = [weight for row in SQUARE_WEIGHTS for weight in row]
+    coverage = [0] * (row_count * column_count)
+    for _, indexes in instances:
+        for index in indexes:
+            coverage[index] += 1
+    tables = {}
+    for name, indexes in instances:
+        if name in tables:
+            continue
+        codes = np.arange(3 ** len(indexes))
+        table = np.zeros(len(codes), dtype=np.int64)
+        for position, index in enumerate(indexes):
+            digits = codes // 3 ** position % 3
+            table += (digits == 1) * (weights[index] * DEFAULT_SCALE // coverage[index])
+        tables[name] = table.astype(np.int16)
+    return tables
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# This class evaluates the positions with the pattern tables
+class PatternEvaluator:
+    def __init__(self, row_count: int = 8, column_count: int = 8, tables: dict = None, scale: float = DEFAULT_SCALE):
+        self.row_count = row_count
+        self.column_count = column_count
+        self.instances = pattern_instances(row_count, column_count)
+        self.tables = default_tables(row_count, column_count) if tables is None else tables   # int16 NumPy arrays
+        self.scale = scale  # Scores are the table values divided by the scale
+        # For each pattern, its table as a list (faster to read one value at a time than the NumPy array)
+        self.lookups = [self.tables[name].tolist() for name, _ in self.instances]
+        # For each box, the patterns that hold it with the power of 3 of its digit in them
+        self.box_patterns = [[] for _ in range(row_count * column_count)]
+        for number, (_, indexes) in enumerate(self.instances):
+            for position, index in enumerate(indexes):
+                self.box_patterns[index].append((number, 3 ** position))
+
+    # This method reads the tables of a file written by save
+    @classmethod
+    def load(cls, path: str, row_count: int = 8, column_count: int = 8):
+        with np.load(path) as data:
+            tables = {name: data[name].astype(np.int16) for name in PATTERN_SHAPES}
+            scale = float(data["scale"])
+        return cls(row_count, column_count, tables, scale)
+
+    # This method writes the tables in a NumPy file
+    def save(self, path: str):
+        np.savez(path, scale=self.scale, **self.tables)
+
+    # This method returns the indexes of the patterns of a flat grid (list of the keys of the boxes), for the point of
+    # view of a player
+    def pattern_indexes(self, cells: list, player: int):
+        digits = DIGITS[player]
+        return [sum(digits[int(cells[index])] * 3 ** position for position, index in enumerate(indexes))
+                for _, indexes in self.instances]
+
+    # This method returns the score of pattern indexes: the sum of the table values of the patterns
+    def score(self, indexes: list):
+        return sum(map(list.__getitem__, self.lookups, indexes)) / self.scale
+
+    # This method gives pattern indexes to a board: they are then updated by the board at each change of its grid
+    def attach(self, board):
+        board.patterns = PatternIndexes(self, board.grid_array().ravel().tolist())
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# This class holds the pattern indexes of a board for both points of view, and updates them at each changed box so that
+# an evaluation is only a few dozen table lookups. A board keeps one in its patterns attribute (see
+# PatternEvaluator.attach)
+class PatternIndexes:
+    def __init__(self, evaluator: PatternEvaluator, cells: list):
+        self.evaluator = evaluator
+        self.indexes = [None, evaluator.pattern_indexes(cells, 1), evaluator.pattern_indexes(cells, 2)]
+        self.saved = []     # Indexes saved by save, restored by restore
+
+    # This method returns a copy, for the copy of a board
+    def copy(self):
+        patterns = PatternIndexes.__new__(PatternIndexes)
+        patterns.evaluator = self.evaluator
+        patterns.indexes = [None, self.indexes[1][:], self.indexes[2][:]]
+        patterns.saved = []
+        return patterns
+
+    # This method computes the indexes again for a new flat grid
+    def load(self, cells: list):
+        self.indexes = [None, self.evaluator.pattern_indexes(cells, 1), self.evaluator.pattern_indexes(cells, 2)]
+
+    # This method updates the indexes when the key of a box changes
+    def change(self, box: int, old_key: int, new_key: int):
+        white_indexes, black_indexes = self.indexes[1], self.indexes[2]
+        white_change = DIGITS[1][new_key] - DIGITS[1][old_key]
+        black_change = DIGITS[2][new_key] - DIGITS[2][old_key]
+        for number, power in self.evaluator.box_patterns[box]:
+            white_indexes[number] += white_change * power
+            black_indexes[number] += black_change * power
+
+    # This method saves the indexes before a move, so that they can be restored when it is undone
+    def save(self):
+        self.saved.append((self.indexes[1][:], self.indexes[2][:]))
+
+    # This method restores the indexes saved by the last call of save
+    def restore(self):
+        self.indexes[1], self.indexes[2] = self.saved.pop()
+
+    # This method returns the score of the position for a player
+    def score(self, player: int):
+        return self.evaluator.score(self.indexes[player])
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Fitting of the tables
+
+# This function fits pattern tables by least squares on positions: the score of a position for a player should be the
+# final disc difference of the game for this player. Each sample is the list of the pattern indexes of a position for a
+# player and its target. The normal equations (with a small ridge term, so that the unseen entries stay at 0) are solved
+# with the conjugate gradient method, the design matrix being only used through the table entries of the samples
+def fit_tables(samples: list, targets: list, row_count: int = 8, column_count: int = 8, ridge: float = 1.0,
+               iterations: int = 200):
+    instances = pattern_instances(row_count, column_count)
+    names = list(dict.fromkeys(name for name, _ in instances))
+    offsets = {}    # First column of each table in the vector of all the table entries
+    size = 0
+    for name in names:
+        offsets[name] = size
+        size += 3 ** len(PATTERN_SHAPES[name])
+    pattern_offsets = np.array([offsets[name] for name, _ in instances])
+    columns = np.asarray(samples, dtype=np.int64) + pattern_offsets     # Table entry of each pattern of each sample
+    targets = np.asarray(targets, dtype=np.float64)
+
+    def normal_product(weights):    # (X^T X + ridge) weights
+        residuals = weights[columns].sum(axis=1)
+        return np.bincount(columns.ravel(), np.repeat(residuals, columns.shape[1]), size) + ridge * weights
+
+    right_side = np.bincount(columns.ravel(), np.repeat(targets, columns.shape[1]), size)
+    weights = np.zeros(size)
+    residual = right_side - normal_product(weights)
+    direction = residual.copy()
+    residual_norm = residual @ residual
+    for _ in range(iterations):
+        if residual_norm < 1e-12:
+            break
+        product = normal_product(direction)
+        step = residual_norm / (direction @ product)
+        weights += step * direction
+        residual -= step * product
+        new_norm = residual @ residual
+        direction = residual + new_norm / residual_norm * direction
+        residual_norm = new_norm
+    # The tables hold int16 values: the scale is the largest one that keeps every weight in range
+    scale = min(DEFAULT_SCALE * 100, 32767 / max(np.abs(weights).max(), 1e-9))
+    tables = {name: np.round(weights[offsets[name]:offsets[name] + 3 ** len(PATTERN_SHAPES[name])] * scale)
+              .astype(np.int16) for name in names}
+    return tables, scale
+
+
+def main(arguments=None):
+    from records import read_archive_header, read_records
+    from engine import Engine, BLACK, WHITE
+    parser = argparse.ArgumentParser(description="Fits pattern tables from a game archive (see records.py).")
+    parser.add_argument("archive", help="game archive file")
+    parser.add_argument("output", help="NumPy file of the fitted tables")
+    parser.add_argument("--ridge", type=float, default=1.0, help="ridge regularisation of the least squares")
+    parser.add_argument("--iterations", type=int, default=200, help="iterations of the conjugate gradient")
+    parser.add_argument("--min-empties", type=int, default=0, help="leave out the positions with fewer empty boxes")
+    arguments = parser.parse_args(arguments)
+
+    row_count, column_count = read_archive_header(arguments.archive)
+    if (row_count, column_count) != (8, 8):
+        parser.error(f"the patterns are only defined for the 8x8 board, {arguments.archive} holds "
+                     f"{row_count}x{column_count} games")
+    evaluator = PatternEvaluator(row_count, column_count)
+    engine = Engine(row_count, column_count)
+    samples, targets = [], []
+    for moves, black_score, white_score in read_records(arguments.archive):
+        board = engine.new_board()
+        player = BLACK
+        for move in moves:
+            if move is not None:
+                board.place_piece(move[0], move[1], player)
+                board.update_grid(move[0], move[1], player)
+            player = engine.other_player(player)
+            if board.count_empties() < arguments.min_empties:
+                break
+            cells = board.grid_array().ravel().tolist()
+            for point_of_view, difference in ((BLACK, black_score - white_score), (WHITE, white_score - black_score)):
+                samples.append(evaluator.pattern_indexes(cells, point_of_view))
+                targets.append(difference)
+    if not samples:
+        parser.error(f"no position in {arguments.archive}")
+    tables, scale = fit_tables(samples, targets, row_count, column_count, arguments.ridge, arguments.iterations)
+    evaluator = PatternEvaluator(row_count, column_count, tables, scale)
+    evaluator.save(arguments.output)
+    error = math.sqrt(np.mean([(evaluator.score(sample) - target) ** 2 for sample, target in zip(samples, targets)]))
+    print(f"{len(samples)} positions, root mean square error {error:.2f} discs, tables written to "
+          f"{arguments.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+from engine import Engine, BLACK, move_to_string, position_to_string
+import argparse
+import struct
+import sys
+
+# Game records: an archive file holds any number of games, each one written as its list of moves with one byte per
+# move. The archive starts with a header (magic, row count, column count), then each game is a small header (number of
+# moves, final score of each player) followed by its moves: the index row * column_count + col of the box, or
+# PASS_CODE when the player had to pass. Games are appended at the end of the archive, and read one after the other
+# without loading the archive in memory. The boards of PASS_CODE boxes or more (16x16) do not fit in one byte: their
+# archives use two bytes for each move and each score (see record_formats).
+#
+#   python records.py games.bin                 # number of games and results
+#   python records.py games.bin --positions     # every position of every game (see string_to_position)
+#   python records.py games.bin --evaluate 2    # every move with the best move and value found by the engine
+
+# Global constant variable
+
+ARCHIVE_MAGIC = b"OTHGAMES"     # First bytes of an archive file
+ARCHIVE_HEADER_FORMAT = "<8sHH"     # Magic, row count, column count
+GAME_HEADER_FORMAT = "<HBB"     # Number of moves, black score, white score
+WIDE_GAME_HEADER_FORMAT = "<HHH"    # The same with two bytes for the scores, for the large boards
+ARCHIVE_HEADER_SIZE = struct.calcsize(ARCHIVE_HEADER_FORMAT)
+PASS_CODE = 255     # Move byte of a pass, so the boards of one byte per move have less than 255 boxes
+WIDE_PASS_CODE = 0xFFFF     # Move code of a pass on the large boards (two bytes per move)
+
+
+# This function returns the formats of the games of an archive for a board size: the format of the game headers, the
+# format of one move (one or two bytes) and the code of a pass
+def record_formats(row_count: int, column_count: int):
+    if row_count * column_count < PASS_CODE:
+        return GAME_HEADER_FORMAT, "B", PASS_CODE
+    return WIDE_GAME_HEADER_FORMAT, "H", WIDE_PASS_CODE
+
+
+# This function converts the moves of a game (None for a pass) into the bytes of their record
+def encode_moves(moves: list, row_count: int, column_count: int):
+    _, move_format, pass_code = record_formats(row_count, column_count)
+    codes = [pass_code if move is None else move[0] * column_count + move[1] for move in moves]
+    return struct.pack(f"<{len(codes)}{move_format}", *codes)
+
+
+# This function converts the bytes of the moves of a record into the list of the moves (None for a pass)
+def decode_moves(data: bytes, row_count: int, column_count: int):
+    _, move_format, pass_code = record_formats(row_count, column_count)
+    codes = struct.unpack(f"<{len(data) // struct.calcsize(move_format)}{move_format}", data)
+    return [None if code == pass_code else divmod(code, column_count) for code in codes]
+
+
+# This function appends a game to an archive, which is created if it does not exist yet
+def append_game(path: str, moves: list, black_score: int, white_score: int, row_count: int = 8,
+                column_count: int = 8):
+    game_header_format, _, _ = record_formats(row_count, column_count)
+    with open(path, "ab") as file:
+        if file.tell() == 0:    # New archive
+            file.write(struct.pack(ARCHIVE_HEADER_FORMAT, ARCHIVE_MAGIC, row_count, column_count))
+        elif read_archive_header(path) != (row_count, column_count):
+            raise ValueError(f"{path} holds games of another board size")
+        file.write(struct.pack(game_header_format, len(moves), black_score, white_score))
+        file.write(encode_moves(moves, row_count, column_count))
+
+
+# This function returns the board size (row count, column count) of an archive
+def read_archive_header(path: str):
+    with open(path, "rb") as file:
+        magic, row_count, column_count = struct.unpack(ARCHIVE_HEADER_FORMAT, file.read(ARCHIVE_HEADER_SIZE))
+    if magic != ARCHIVE_MAGIC:
+        raise ValueError(f"{path} is not a game archive")
+    return row_count, column_count
+
+
+# This function reads the games of an archive one after the other. It yields, for each game, the list of its moves
+# (None for a pass), the black score and the white score
+def read_records(path: str):
+    with open(path, "rb") as file:
+        magic, row_count, column_count = struct.unpack(ARCHIVE_HEADER_FORMAT, file.read(ARCHIVE_HEADER_SIZE))
+        if magic != ARCHIVE_MAGIC:
+            raise ValueError(f"{path} is not a game archive")
+        game_header_format, move_format, _ = record_formats(row_count, column_count)
+        game_header_size = struct.calcsize(game_header_format)
+        move_size = struct.calcsize(move_format)
+        while True:
+            header = file.read(game_header_size)
+            if len(header) < game_header_size:  # End of the archive (or a game cut while it was written)
+                return
+            move_count, black_score, white_score = struct.unpack(game_header_format, header)
+            data = file.read(move_count * move_size)
+            if len(data) < move_count * move_size:
+                return
+            yield decode_moves(data, row_count, column_count), black_score, white_score
+
+
+# This function replays the games of an archive on a board of the engine. It yields, before each move, the number of
+# the game, the number of the move, the board, the player to move and the move he played (None for a pass).
+# The same board is used for all the positions of a game: it must be copied to be kept after the next position
+def replay_positions(path: str, engine: Engine = None):
+    if engine is None:
+        engine = Engine(*read_archive_header(path))
+    for game_number, (moves, _, _) in enumerate(read_records(path)):
+        board = engine.new_board()
+        player = BLACK
+        for move_number, move in enumerate(moves):
+            yield game_number, move_number, board, player, move
+            if move is not None:
+                board.place_piece(move[0], move[1], player)
+                board.update_grid(move[0], move[1], player)
+            player = engine.other_player(player)
+
+
+# This function evaluates every move of the games of an archive with the engine. It yields the number of the game,
+# the number of the move, the position (see position_to_string), the move played and the best move found by the
+# engine with its value. The positions where the player had to pass are skipped
+def replay_evaluations(path: str, engine: Engine, depth: int):
+    for game_number, move_number, board, player, move in replay_positions(path, engine):
+        if move is None:
+            continue
+        best_move, value = engine.search(board, player, depth)
+        yield game_number, move_number, position_to_string(board, player), move, best_move, value
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Reads a game archive.")
+    parser.add_argument("archive", help="game archive file")
+    parser.add_argument("--positions", action="store_true", help="write every position of every game")
+    parser.add_argument("--evaluate", type=int, metavar="DEPTH", help="evaluate every move with a search of this depth")
+    arguments = parser.parse_args(arguments)
+
+    if arguments.evaluate is not None:
+        engine = Engine(*read_archive_header(arguments.archive))
+        for game_number, move_number, position, move, best_move, value in \
+                replay_evaluations(arguments.archive, engine, arguments.evaluate):
+            best = move_to_string(best_move) if best_move is not None else "pass"
+            print(f"{game_number} {move_number} {position} {move_to_string(move)} {best} {value:g}")
+    elif arguments.positions:
+        for game_number, move_number, board, player, _ in replay_positions(arguments.archive):
+            print(f"{game_number} {move_number} {position_to_string(board, player)}")
+    else:
+        games = black_wins = white_wins = 0
+        for _, black_score, white_score in read_records(arguments.archive):
+            games += 1
+            black_wins += black_score > white_score
+            white_wins += white_score > black_score
+        print(f"{games} games: {black_wins} black wins, {white_wins} white wins, "
+              f"{games - black_wins - white_wins} draws", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+from engine import Engine, BLACK, BOARD_BACKENDS, move_to_string, string_to_move, position_to_string
+from book import OpeningBook
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import collections
+import json
+import os
+import sys
+import time
+
+# Engine server: many games at once over a local TCP or Unix socket, with a line protocol in the spirit of GTP.
+# Each connection is a session holding one game. A command is one line, its answer is one line starting with "= " when
+# it succeeded, or "? " followed by the error:
+#
+#   new                     starts a new game from the starting position, black to move
+#   setboard POSITION       sets the position (64 box characters and the player to move, see string_to_position)
+#   play MOVE               plays a move ("d3", or "pass") of the player to move
+#   go depth N              searches the best move of the player to move with a search of depth N, plays it and
+#   go time SECONDS         answers "= MOVE VALUE" ("= pass" if the player has to pass). With time, the depths 1, 2...
+#                           are searched until the time is over, the answer is the move of the last finished depth.
+#                           The depth is capped by --max-depth and by the number of empty boxes, the time by --max-time
+#   position                answers the position of the game
+#   stats                   answers the metrics of the server as one JSON object
+#   quit                    closes the session
+#
+# The searches run on a pool of worker processes, each one with its own engine. The engine of a worker keeps its
+# transposition table from one search to the next, whatever the session, so the sessions share what the workers have
+# already searched (and the opening book). The searches wait in a bounded queue: when it is full, "go" answers
+# "? busy" at once instead of making the client wait.
+#
+#   python server.py --port 5000 --workers 4
+#   python server.py --unix /tmp/othello.sock
+#   python server.py --stdio    # one session on the standard input and output, for local testing
+
+# Global constant variable
+
+DEFAULT_PORT = 5000
+QUEUE_SIZE = 256    # Searches waiting for a worker, beyond it the server is busy
+MAX_GO_DEPTH = 8    # Deepest search of "go depth", so that one client cannot keep a worker busy for ever
+MAX_GO_TIME = 30.0  # Longest search of "go time", in seconds
+LATENCY_SAMPLES = 1000  # Number of recent latencies kept for each command to compute the metrics
+BOOK_PATH = "assets/book.bin"   # Opening book of the workers if the file exists (see book.py)
+COMMANDS = ("new", "setboard", "play", "go", "position", "stats", "quit")   # Commands of the protocol
+
+# Global variables of each worker process, set by init_worker
+worker_engine = None
+worker_book = None
+
+
+# This function is called once in each worker process, it creates the engine of the worker and opens the book
+def init_worker(backend: str, book_path: str):
+    global worker_engine, worker_book
+    worker_engine = Engine(backend=backend)
+    worker_book = OpeningBook(book_path) if book_path and os.path.exists(book_path) else None
+
+
+# This function is executed by a worker: it searches the best move of a position, with a fixed depth or until the
+# time limit (in seconds) is over. It returns the best move, its value, the depth of the search and its duration
+def search_position(position: str, depth: int, time_limit: float = None):
+    start = time.perf_counter()
+    board, player = worker_engine.board_from_string(position)
+    if worker_book is not None:
+        best_move, value = worker_book.book_move(board, player)
+        if best_move is not None:
+            return best_move, value, 0, time.perf_counter() - start
+    if time_limit is None:
+        best_move, value = worker_engine.search(board, player, depth)
+        return best_move, value, depth, time.perf_counter() - start
+    # The depths are searched one after the other until the time is over, the book lookup is part of the time
+    best_move, value, depth = worker_engine.search_timed(board, player, time_limit - (time.perf_counter() - start))
+    return best_move, value, depth, time.perf_counter() - start
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# This class keeps the latencies of the requests of the server, for each command
+class LatencyMetrics:
+    def __init__(self):
+        self.counts = collections.Counter()     # Number of requests of each command
+        self.samples = {}   # For each command, its last latencies in seconds
+
+    # This method saves the latency of a request
+    def add(self, command: str, latency: float):
+        self.counts[command] += 1
+        self.samples.setdefault(command, collections.deque(maxlen=LATENCY_SAMPLES)).append(latency)
+
+    # This method returns, for each command, the number of requests and the statistics of the last latencies in
+    # milliseconds
+    def to_dict(self):
+        metrics = {}
+        for command, samples in self.samples.items():
+            ordered = sorted(samples)
+            metrics[command] = {"count": self.counts[command],
+                                "mean_ms": sum(ordered) / len(ordered) * 1000,
+                                "p50_ms": ordered[len(ordered) // 2] * 1000,
+                                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                                "max_ms": ordered[-1] * 1000}
+        return metrics
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# This class is one game of a client: the board and the player to move
+class Session:
+    def __init__(self, server):
+        self.server = server
+        self.engine = server.engine     # Engine of the server process, only used for the boards and the rules
+        self.board = self.engine.new_board()
+        self.player = BLACK
+
+    # This method returns whether the player to move has an available move, and leaves them in the board
+    def has_moves(self):
+        self.board.is_there_valid_move(self.player, self.engine.other_player(self.player))
+        return bool(self.board.available_moves)
+
+    # This method plays a move of the player to move (None for a pass), it raises ValueError if it is illegal
+    def play(self, move):
+        if move is None:
+            if self.has_moves():
+                raise ValueError("cannot pass, a move is available")
+        else:
+            if not self.has_moves() or move not in self.board.available_moves:
+                raise ValueError(f"illegal move {move_to_string(move)}")
+            self.board.make_move(move[0], move[1], self.player)
+            self.board.undo_stack.clear()   # The moves of a game are never undone
+        self.player = self.engine.other_player(self.player)
+
+    # This method executes a command line and returns its answer (without the "= " or "? " prefix). It raises
+    # ValueError for an invalid command
+    async def execute(self, command: str, arguments: list):
+        if command == "new":
+            self.board = self.engine.new_board()
+            self.player = BLACK
+            return ""
+        if command == "setboard":
+            self.board, self.player = self.engine.board_from_string(" ".join(arguments))
+            return ""
+        if command == "play":
+            if len(arguments) != 1:
+                raise ValueError("play needs one move")
+            self.play(None if arguments[0].lower() == "pass" else string_to_move(arguments[0]))
+            return ""
+        if command == "go":
+            return await self.go(arguments)
+        if command == "position":
+            return position_to_string(self.board, self.player)
+        if command == "stats":
+            return json.dumps(self.server.metrics())
+        raise ValueError(f"unknown command {command!r}")
+
+    # This method executes the go command: the search is done by a worker and its move is played
+    async def go(self, arguments: list):
+        if len(arguments) != 2 or arguments[0] not in ("depth", "time"):
+            raise ValueError("go needs 'depth N' or 'time SECONDS'")
+        if arguments[0] == "depth":
+            depth, time_limit = int(arguments[1]), None
+            if depth < 1:
+                raise ValueError("the depth must be at least 1")
+            # A search deeper than the number of empty boxes only reaches the end of the game, like this depth
+            depth = max(1, min(depth, self.server.max_depth, self.board.count_empties()))
+        else:
+            depth, time_limit = None, float(arguments[1])
+            if not time_limit > 0:  # NaN is refused too
+                raise ValueError("the time must be positive")
+            time_limit = min(time_limit, self.server.max_time)
+        if not self.has_moves():
+            self.play(None)
+            return "pass"
+        best_move, value, _ = await self.server.search(position_to_string(self.board, self.player), depth, time_limit)
+        self.play(best_move)
+        return f"{move_to_string(best_move)} {value:g}"
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# This class is the server: it accepts the sessions and sends their searches to the worker processes
+class EngineServer:
+    def __init__(self, workers: int = None, queue_size: int = QUEUE_SIZE, backend: str = "bitboard",
+                 book_path: str = BOOK_PATH, max_depth: int = MAX_GO_DEPTH, max_time: float = MAX_GO_TIME):
+        self.engine = Engine(backend=backend)
+        self.max_depth = max_depth  # Deepest search of "go depth"
+        self.max_time = max_time    # Longest search of "go time", in seconds
+        self.workers = workers or os.cpu_count()    # Number of worker processes, and of searches done at once
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                            initargs=(backend, book_path))
+        self.queue = None   # Searches waiting for a worker: (position, depth, time limit, future of the result)
+        self.queue_size = queue_size
+        self.dispatchers = []   # Tasks that take the searches from the queue, one per worker
+        # Metrics
+        self.latencies = LatencyMetrics()   # Latency of the requests, from the reception of the line to the answer
+        self.search_latencies = LatencyMetrics()    # Time spent by the searches in the queue and in the workers
+        self.sessions = 0   # Number of sessions in progress
+        self.total_sessions = 0
+        self.busy_count = 0     # Number of searches refused because the queue was full
+        self.start_time = time.perf_counter()
+
+    # This method starts the tasks that send the searches to the workers, it must be called in the event loop
+    def start(self):
+        self.queue = asyncio.Queue(self.queue_size)
+        self.dispatchers = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+
+    # This method takes the searches from the queue and runs them on the workers, one at a time
+    async def dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            position, depth, time_limit, future, queued_time = await self.queue.get()
+            self.search_latencies.add("queue", time.perf_counter() - queued_time)
+            try:
+                result = await loop.run_in_executor(self.executor, search_position, position, depth, time_limit)
+            except Exception as error:  # The session gets the error, the dispatcher keeps running
+                if not future.cancelled():
+                    future.set_exception(error)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self.queue.task_done()
+
+    # This method searches a position on a worker. It returns the best move, its value and the depth of the search.
+    # It raises ValueError if the queue is full
+    async def search(self, position: str, depth: int, time_limit: float = None):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((position, depth, time_limit, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.busy_count += 1
+            raise ValueError("busy")
+        best_move, value, depth, duration = await future
+        self.search_latencies.add("search", duration)
+        return best_move, value, depth
+
+    # This method returns the metrics of the server
+    def metrics(self):
+        return {"sessions": self.sessions,
+                "total_sessions": self.total_sessions,
+                "workers": self.workers,
+                "queued": self.queue.qsize(),
+                "busy": self.busy_count,
+                "uptime": time.perf_counter() - self.start_time,
+                "latency": self.latencies.to_dict(),
+                "search": self.search_latencies.to_dict()}
+
+    # This method runs a session: it reads the command lines with the read_line coroutine and writes the answers with
+    # the write_line function, until the end of the input or the quit command
+    async def run_session(self, read_line, write_line):
+        session = Session(self)
+        self.sessions += 1
+        self.total_sessions += 1
+        try:
+            while True:
+                line = await read_line()
+                if not line:    # End of the input
+                    break
+                start = time.perf_counter()
+                words = line.split()
+                if not words or words[0].startswith("#"):
+                    continue
+                command = words[0].lower()
+                if command == "quit":
+                    await write_line("= ")
+                    break
+                try:
+                    answer = "= " + await session.execute(command, words[1:])
+                except (ValueError, IndexError) as error:
+                    answer = f"? {error}"
+                except Exception as error:  # A failed search must not end the session
+                    answer = f"? error {type(error).__name__}: {error}"
+                await write_line(answer)
+                self.latencies.add(command if command in COMMANDS else "unknown", time.perf_counter() - start)
+        finally:
+            self.sessions -= 1
+
+    # This method runs the session of a socket connection
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async def read_line():
+            try:
+                return (await reader.readline()).decode()
+            except (ConnectionError, UnicodeDecodeError):
+                return ""
+
+        async def write_line(text: str):
+            writer.write((text + "\n").encode())
+            await writer.drain()
+
+        try:
+            await self.run_session(read_line, write_line)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # This method runs one session on the standard input and output
+    async def run_stdio(self):
+        loop = asyncio.get_running_loop()
+
+        async def read_line():
+            return await loop.run_in_executor(None, sys.stdin.readline)
+
+        async def write_line(text: str):
+            print(text, flush=True)
+
+        await self.run_session(read_line, write_line)
+
+    # This method stops the workers
+    def close(self):
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+        self.executor.shutdown(cancel_futures=True)
+
+
+async def serve(arguments):
+    server = EngineServer(arguments.workers, arguments.queue_size, arguments.backend, arguments.book,
+                          arguments.max_depth, arguments.max_time)
+    server.start()
+    try:
+        if arguments.stdio:
+            await server.run_stdio()
+            return
+        if arguments.unix:
+            listener = await asyncio.start_unix_server(server.handle_connection, path=arguments.unix)
+        else:
+            listener = await asyncio.start_server(server.handle_connection, arguments.host, arguments.port)
+        addresses = ", ".join(str(socket.getsockname()) for socket in listener.sockets)
+        print(f"serving on {addresses} with {server.workers} workers", file=sys.stderr)
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Serves the engine to many games over a line protocol.")
+    parser.add_argument("--host", default="127.0.0.1", help="address of the TCP socket (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port of the TCP socket (default: 5000)")
+    parser.add_argument("--unix", help="path of a Unix socket, instead of the TCP socket")
+    parser.add_argument("--stdio", action="store_true", help="one session on the standard input and output")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE,
+                        help="number of searches that can wait for a worker (default: 256)")
+    parser.add_argument("--backend", choices=sorted(BOARD_BACKENDS), default="bitboard",
+                        help="board implementation of the engines")
+    parser.add_argument("--book", default=BOOK_PATH, help="opening book of the workers, if the file exists")
+    parser.add_argument("--max-depth", type=int, default=MAX_GO_DEPTH,
+                        help="deepest search of 'go depth' (default: 8)")
+    parser.add_argument("--max-time", type=float, default=MAX_GO_TIME,
+                        help="longest search of 'go time' in seconds (default: 30)")
+    arguments = parser.parse_args(arguments)
+    try:
+        asyncio.run(serve(arguments))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
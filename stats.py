@@ -0,0 +1,107 @@
+import json
+import logging
+import time
+
+# Statistics of the searches of the engine. After each search, the engine passes its SearchStats to the search hooks
+# (see Engine.add_search_hook), for instance log_search_stats which writes them as one JSON log line.
+
+logger = logging.getLogger("othello.search")
+
+# Global constant variable
+
+TIMED_CATEGORIES = ("move_generation", "make_unmake", "evaluation", "board_copy")  # Parts of the search that are timed
+
+
+# This class holds the statistics of one search
+class SearchStats:
+    def __init__(self, player: int = None, depth: int = None, timed: bool = False):
+        self.player = player    # Player of the search
+        self.depth = depth  # Depth of the search
+        self.timed = timed  # Whether the time spent in each part of the search is measured (see instrument)
+        self.nodes = 0  # Number of visited nodes
+        self.leaves = 0     # Number of evaluated positions
+        self.nodes_by_depth = {}    # For each remaining depth, the number of searched nodes with available moves
+        self.children_by_depth = {}     # For each remaining depth, the number of available moves of these nodes
+        self.times = dict.fromkeys(TIMED_CATEGORIES, 0.0)   # Time spent in each part of the search, in seconds
+        self.nested_time = 0.0  # Time spent in the timed calls made by the timed call in progress
+        self.elapsed = 0.0  # Duration of the search, in seconds
+        self.best_move = None
+        self.value = None
+        self.principal_variation = []   # Expected moves of both players from the position, best move first
+        self.solved = False     # Whether the search was done by the endgame solver
+        self.table_probes = 0   # Number of lookups in the transposition table
+        self.table_hit_rate = 0.0   # Proportion of these lookups that found the position
+        self.start_time = time.perf_counter()
+
+    # This method saves a searched node with its number of available moves
+    def add_node(self, depth: int, move_count: int):
+        self.nodes_by_depth[depth] = self.nodes_by_depth.get(depth, 0) + 1
+        self.children_by_depth[depth] = self.children_by_depth.get(depth, 0) + move_count
+
+    # This method returns, for each remaining depth, the average number of available moves of the searched nodes
+    def branching_factors(self):
+        return {depth: self.children_by_depth[depth] / count for depth, count in self.nodes_by_depth.items()}
+
+    # This method returns a function that calls the given function and adds its duration to the time of the category.
+    # The time of the timed calls that it makes itself is only counted in their own category
+    def timed_function(self, category: str, function):
+        def timed_call(*arguments):
+            outer_nested_time = self.nested_time
+            self.nested_time = 0.0
+            start = time.perf_counter()
+            result = function(*arguments)
+            duration = time.perf_counter() - start
+            self.times[category] += duration - self.nested_time
+            self.nested_time = outer_nested_time + duration
+            return result
+        return timed_call
+
+    # This method replaces the methods of a search board and the evaluation methods of the engine by timed versions,
+    # when the times are measured. Only these objects are modified, and release puts the engine back at the end of the
+    # search, so the searches are not slowed down when the times are not measured
+    def instrument(self, board, engine):
+        if not self.timed:
+            return
+        board.is_there_valid_move = self.timed_function("move_generation", board.is_there_valid_move)
+        board.make_move = self.timed_function("make_unmake", board.make_move)
+        board.unmake_move = self.timed_function("make_unmake", board.unmake_move)
+        engine.evaluate_board = self.timed_function("evaluation", engine.evaluate_board)
+        engine.evaluate_children = self.timed_function("evaluation", engine.evaluate_children)
+
+    # This method removes the timed evaluation methods of the engine
+    def release(self, engine):
+        for name in ("evaluate_board", "evaluate_children"):
+            engine.__dict__.pop(name, None)
+
+    # This method saves the result of the search
+    def finish(self, best_move, value, nodes: int, table_probes: int = 0, table_hit_rate: float = 0.0):
+        self.elapsed = time.perf_counter() - self.start_time
+        self.best_move = best_move
+        self.value = value
+        self.nodes = nodes
+        self.table_probes = table_probes
+        self.table_hit_rate = table_hit_rate
+
+    # This method returns the statistics as a dictionary that can be written in JSON
+    def to_dict(self):
+        statistics = {"player": self.player,
+                      "depth": self.depth,
+                      "solved": self.solved,
+                      "best_move": self.best_move,
+                      "value": self.value,
+                      "principal_variation": self.principal_variation,
+                      "nodes": self.nodes,
+                      "leaves": self.leaves,
+                      "elapsed": self.elapsed,
+                      "nodes_per_second": self.nodes / self.elapsed if self.elapsed else 0.0,
+                      "branching_factors": self.branching_factors(),
+                      "table_probes": self.table_probes,
+                      "table_hit_rate": self.table_hit_rate}
+        if self.timed:
+            statistics["times"] = self.times
+        return statistics
+
+
+# This function is a search hook that writes the statistics of a search as one JSON line on the "othello.search" logger
+def log_search_stats(stats: SearchStats):
+    logger.info(json.dumps(stats.to_dict()))
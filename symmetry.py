@@ -0,0 +1,130 @@
+# Symmetries of the board: a position and its images by the rotations and reflections of the grid have the same value,
+# and their best moves are the images of each other. The canonical form of a position is the smallest of its images, so
+# that all the symmetric positions share one entry in the caches (opening book, transposition table).
+#
+# A transform is a number from 0 to 7 whose bits tell the operations done on a box (row, col), in this order:
+# TRANSPOSE swaps the row and the column, MIRROR reverses the columns, FLIP reverses the rows. A rectangular board only
+# has the transforms without TRANSPOSE. The positions are read as bitboards (the box (row, col) is the bit number
+# row * column_count + col). The transforms of the 8x8 board are done with a few bit operations on the 64 bits
+# integers, the other sizes use a table of the image of each box.
+
+# Global constant variable
+
+MIRROR = 1  # Reverses the columns
+FLIP = 2    # Reverses the rows
+TRANSPOSE = 4   # Swaps the rows and the columns (square boards only), done before the other operations
+
+# Inverse of each transform. Mirroring after a transposition is undone by a transposition after a flip, so the two
+# reflections are swapped in the inverse of the transforms with TRANSPOSE
+INVERSE_TRANSFORMS = [0, 1, 2, 3, 4, 6, 5, 7]
+
+BOX_TABLES = {}     # Image of each box by each transform, for each board size (see box_table)
+
+# Masks of the 8x8 bit operations (see mirror_bits and transpose_bits)
+MIRROR_MASKS = ((1, 0x5555555555555555), (2, 0x3333333333333333), (4, 0x0F0F0F0F0F0F0F0F))
+TRANSPOSE_MASKS = ((28, 0x0F0F0F0F00000000), (14, 0x3333000033330000), (7, 0x5500550055005500))
+
+
+# This function returns the transforms of a board size: all of them for a square board, and the ones without
+# TRANSPOSE for a rectangular board
+def board_transforms(row_count: int, column_count: int):
+    return range(8) if row_count == column_count else range(4)
+
+
+# This function returns the image (row, col) of a box by a transform
+def transform_move(move: (int, int), transform: int, row_count: int = 8, column_count: int = 8):
+    row, col = move
+    if transform & TRANSPOSE:
+        row, col = col, row
+    if transform & MIRROR:
+        col = column_count - 1 - col
+    if transform & FLIP:
+        row = row_count - 1 - row
+    return row, col
+
+
+# This function returns the box (row, col) whose image by a transform is the given box. It maps a move of a canonical
+# position back to the board it was computed from
+def restore_move(move: (int, int), transform: int, row_count: int = 8, column_count: int = 8):
+    return transform_move(move, INVERSE_TRANSFORMS[transform], row_count, column_count)
+
+
+# This function returns the table of a board size: for each transform, the list of the index of the image of each box
+def box_table(row_count: int, column_count: int):
+    if (row_count, column_count) not in BOX_TABLES:
+        table = []
+        for transform in board_transforms(row_count, column_count):
+            images = []
+            for index in range(row_count * column_count):
+                row, col = transform_move(divmod(index, column_count), transform, row_count, column_count)
+                images.append(row * column_count + col)
+            table.append(images)
+        BOX_TABLES[(row_count, column_count)] = table
+    return BOX_TABLES[(row_count, column_count)]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Bit operations of the 8x8 board
+
+# This function reverses the columns of a 8x8 bitboard: the bits of each byte (row) are reversed by swapping the bits,
+# the pairs of bits and the halves of the bytes
+def mirror_bits(bits: int):
+    for shift, mask in MIRROR_MASKS:
+        bits = ((bits >> shift) & mask) | ((bits & mask) << shift)
+    return bits
+
+
+# This function reverses the rows of a 8x8 bitboard: the rows are its bytes, their order is reversed
+def flip_bits(bits: int):
+    return int.from_bytes(bits.to_bytes(8, "little"), "big")
+
+
+# This function swaps the rows and the columns of a 8x8 bitboard: the blocks of 4x4, 2x2 then 1x1 boxes on each side
+# of the diagonal are exchanged
+def transpose_bits(bits: int):
+    for shift, mask in TRANSPOSE_MASKS:
+        swapped = mask & (bits ^ (bits << shift))
+        bits ^= swapped ^ (swapped >> shift)
+    return bits
+
+
+# This function returns the images of a 8x8 bitboard by the 8 transforms, in the order of the transform numbers
+def bits_images(bits: int):
+    mirrored = mirror_bits(bits)
+    transposed = transpose_bits(bits)
+    transposed_mirrored = mirror_bits(transposed)
+    return (bits, mirrored, flip_bits(bits), flip_bits(mirrored),
+            transposed, transposed_mirrored, flip_bits(transposed), flip_bits(transposed_mirrored))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Transforms of the positions
+
+# This function returns the image of a bitboard by a transform
+def transform_bits(bits: int, transform: int, row_count: int = 8, column_count: int = 8):
+    if (row_count, column_count) == (8, 8):
+        if transform & TRANSPOSE:
+            bits = transpose_bits(bits)
+        if transform & MIRROR:
+            bits = mirror_bits(bits)
+        if transform & FLIP:
+            bits = flip_bits(bits)
+        return bits
+    images = box_table(row_count, column_count)[transform]
+    transformed = 0
+    while bits:
+        lowest_bit = bits & -bits
+        transformed |= 1 << images[lowest_bit.bit_length() - 1]
+        bits ^= lowest_bit
+    return transformed
+
+
+# This function returns the canonical form of a position given as the bitboards of both players: the smallest of its
+# images (white bits first, then black bits), and the transform that gives it. When several transforms give the same
+# image (the position is symmetric), the smallest transform is returned
+def canonical_form(white_bits: int, black_bits: int, row_count: int = 8, column_count: int = 8):
+    if (row_count, column_count) == (8, 8):
+        return min(zip(bits_images(white_bits), bits_images(black_bits), range(8)))
+    return min((transform_bits(white_bits, transform, row_count, column_count),
+                transform_bits(black_bits, transform, row_count, column_count), transform)
+               for transform in board_transforms(row_count, column_count))
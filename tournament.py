@@ -0,0 +1,252 @@
+from engine import Engine, WHITE, BLACK, move_to_string
+from book import string_to_game, read_games
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+
+# Tournament between engine settings: every pair of players plays each opening twice, once with each color, on a pool
+# of worker processes. Each game is written as one JSON line as soon as it ends, and the file ends with a summary line:
+# the results of each player, and for each pair of players the Elo difference with its 95% confidence interval.
+#
+#   python tournament.py results.jsonl --player d2:depth=2 --player d3:depth=3 --openings 20 --workers 8
+#   python tournament.py results.jsonl --player old:depth=3,endgame_empties=0 --player new:depth=3 \
+#       --openings-file games.txt
+#   python tournament.py results.jsonl --player d3:depth=3 --player fast:time=0.2 --openings 20
+#
+# A player is a name and the settings of its engine: depth (fixed search depth) or time (seconds per move, searched by
+# iterative deepening, see Engine.search_timed) and the arguments of Engine (backend, table_size, batch_leaves,
+# endgame_empties, evaluator, pattern_tables, symmetric_table).
+
+# Global constant variable
+
+OPENING_PLIES = 4   # Number of random moves played before the engines play, to get different games
+CONFIDENCE_Z = 1.96     # Normal quantile of the 95% confidence intervals
+
+# Global variable of each worker process: the engines already created, by player settings
+worker_engines = {}
+
+
+# This function reads a player description "name:setting=value,setting=value" into (name, settings)
+def parse_player(text: str):
+    name, _, description = text.partition(":")
+    settings = {"depth": 1}
+    for setting in filter(None, description.split(",")):
+        key, _, value = setting.partition("=")
+        if value.lower() in ("true", "false"):
+            settings[key] = value.lower() == "true"
+        else:
+            try:
+                settings[key] = int(value)
+            except ValueError:
+                try:
+                    settings[key] = float(value)
+                except ValueError:
+                    settings[key] = value
+    if not name:
+        raise ValueError(f"a player needs a name: {text!r}")
+    return name, settings
+
+
+# This function returns the engine of a player in the worker process, it is created at the first game of the player
+def player_engine(settings: dict):
+    key = tuple(sorted(settings.items()))
+    if key not in worker_engines:
+        arguments = {name: value for name, value in settings.items() if name not in ("depth", "time")}
+        worker_engines[key] = Engine(**arguments)
+    return worker_engines[key]
+
+
+# This function returns random openings: lists of moves from the starting position (see Engine.random_moves). They are
+# all different, unless there are not enough of them
+def random_openings(count: int, plies: int, seed: int):
+    generator = random.Random(seed)
+    engine = Engine()
+    openings = []
+    for attempt in itertools.count():
+        if len(openings) == count:
+            break
+        moves = engine.random_moves(plies, generator)
+        if moves not in openings or attempt >= count * 10:
+            openings.append(moves)
+    return openings
+
+
+# This function is executed by a worker: it plays a game between two players from an opening, and returns its record
+def play_game(game_id: int, opening: list, black: (str, dict), white: (str, dict)):
+    players = {BLACK: black, WHITE: white}
+    engines = {key: player_engine(settings) for key, (_, settings) in players.items()}
+    for engine in engines.values():
+        engine.clear()  # The games are independent
+    board, player = engines[BLACK].replay_moves(opening)
+    moves = [move_to_string(move) for move in opening]
+    times = {BLACK: 0.0, WHITE: 0.0}    # Search time of each player
+    move_counts = {BLACK: 0, WHITE: 0}
+    passes = 0
+    while passes < 2:   # The game ends when both players have to pass
+        engine = engines[player]
+        start = time.perf_counter()
+        settings = players[player][1]
+        if "time" in settings:
+            best_move, _, _ = engine.search_timed(board, player, settings["time"])
+        else:
+            best_move, _ = engine.search(board, player, settings["depth"])
+        times[player] += time.perf_counter() - start
+        if best_move is None:
+            passes += 1
+            moves.append("pass")
+        else:
+            passes = 0
+            move_counts[player] += 1
+            board.make_move(best_move[0], best_move[1], player)
+            moves.append(move_to_string(best_move))
+        player = engine.other_player(player)
+    while moves and moves[-1] == "pass":   # The final passes are not moves
+        moves.pop()
+    black_score, white_score = board.count_points(BLACK), board.count_points(WHITE)
+    if black_score > white_score:
+        winner = black[0]
+    elif white_score > black_score:
+        winner = white[0]
+    else:
+        winner = None
+    return {"type": "game",
+            "game": game_id,
+            "black": black[0],
+            "white": white[0],
+            "black_score": black_score,
+            "white_score": white_score,
+            "winner": winner,
+            "moves": "".join(move if move != "pass" else "--" for move in moves),
+            "black_time": times[BLACK],
+            "white_time": times[WHITE],
+            "black_moves": move_counts[BLACK],
+            "white_moves": move_counts[WHITE]}
+
+
+# This function returns the Elo difference of a score (the average points of a player, 1 for a win and 0.5 for a
+# draw). A score of 0 or 1 has no finite Elo difference, None is returned (written as null in the JSON results)
+def score_to_elo(score: float):
+    if score <= 0 or score >= 1:
+        return None
+    return -400 * math.log10(1 / score - 1)
+
+
+# This function writes an Elo difference for the summary printed at the end of the tournament
+def elo_to_string(elo: float):
+    return "unbounded" if elo is None else f"{elo:+.0f}"
+
+
+# This function returns the Elo difference of a player against another one, with its 95% confidence interval,
+# from the list of his points in their games
+def elo_estimate(points: list):
+    count = len(points)
+    score = sum(points) / count
+    deviation = math.sqrt(max(sum(point * point for point in points) / count - score * score, 0) / count)
+    return {"games": count,
+            "score": score,
+            "elo": score_to_elo(score),
+            "elo_low": score_to_elo(score - CONFIDENCE_Z * deviation),
+            "elo_high": score_to_elo(score + CONFIDENCE_Z * deviation)}
+
+
+# This function summarises the records of the games: the results of each player and the Elo difference of each pair
+def summarise(records: list, names: list, elapsed: float):
+    players = {name: {"games": 0, "wins": 0, "draws": 0, "losses": 0, "time": 0.0, "moves": 0} for name in names}
+    pair_points = {}    # For each pair (first player, second player), the points of the first player in each game
+    for record in records:
+        for color, other_color in (("black", "white"), ("white", "black")):
+            statistics = players[record[color]]
+            statistics["games"] += 1
+            statistics["time"] += record[f"{color}_time"]
+            statistics["moves"] += record[f"{color}_moves"]
+            if record["winner"] is None:
+                statistics["draws"] += 1
+            elif record["winner"] == record[color]:
+                statistics["wins"] += 1
+            else:
+                statistics["losses"] += 1
+        first, second = sorted((record["black"], record["white"]), key=names.index)
+        points = 0.5 if record["winner"] is None else float(record["winner"] == first)
+        pair_points.setdefault((first, second), []).append(points)
+    for statistics in players.values():
+        games = statistics["games"]
+        statistics["win_rate"] = statistics["wins"] / games if games else 0.0
+        statistics["time_per_move"] = statistics.pop("time") / statistics["moves"] if statistics["moves"] else 0.0
+    return {"type": "summary",
+            "games": len(records),
+            "elapsed": elapsed,
+            "games_per_minute": len(records) / elapsed * 60 if elapsed else 0.0,
+            "players": players,
+            "pairs": [dict(elo_estimate(points), player=first, opponent=second)
+                      for (first, second), points in pair_points.items()]}
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Plays a tournament between engine settings.")
+    parser.add_argument("output", help="JSON lines file of the results")
+    parser.add_argument("--player", action="append", required=True,
+                        help="player as name:setting=value,... (at least two players)")
+    parser.add_argument("--openings", type=int, default=10, help="number of random openings (default: 10)")
+    parser.add_argument("--opening-plies", type=int, default=OPENING_PLIES,
+                        help="number of random moves of the openings (default: 4)")
+    parser.add_argument("--openings-file", help="file of openings, one list of moves per line, instead of random ones")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the openings")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    arguments = parser.parse_args(arguments)
+
+    players = [parse_player(text) for text in arguments.player]
+    names = [name for name, _ in players]
+    if len(set(names)) != len(names) or len(names) < 2:
+        parser.error("the tournament needs at least two players with different names")
+    if arguments.openings_file:
+        openings = []
+        for line_number, line in enumerate(read_games(arguments.openings_file), 1):
+            try:
+                opening = string_to_game(line)
+                Engine().replay_moves(opening)    # Checks that the moves are legal
+                openings.append(opening)
+            except ValueError as error:
+                print(f"opening {line_number}: {error}", file=sys.stderr)
+    else:
+        openings = random_openings(arguments.openings, arguments.opening_plies, arguments.seed)
+
+    games = []  # Each pair plays each opening twice, once with each color
+    for first, second in itertools.combinations(players, 2):
+        for opening in openings:
+            games.append((opening, first, second))
+            games.append((opening, second, first))
+
+    start = time.perf_counter()
+    records = []
+    with ProcessPoolExecutor(max_workers=arguments.workers) as executor, open(arguments.output, "w") as output:
+        futures = [executor.submit(play_game, game_id, opening, black, white)
+                   for game_id, (opening, black, white) in enumerate(games)]
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            output.write(json.dumps(record, allow_nan=False) + "\n")
+            output.flush()  # The results can be followed while the tournament is running
+            print(f"game {record['game']}: {record['black']} {record['black_score']} - "
+                  f"{record['white_score']} {record['white']}", file=sys.stderr)
+        summary = summarise(records, names, time.perf_counter() - start)
+        output.write(json.dumps(summary, allow_nan=False) + "\n")
+
+    for pair in summary["pairs"]:
+        print(f"{pair['player']} vs {pair['opponent']}: score {pair['score']:.3f} over {pair['games']} games, "
+              f"Elo {elo_to_string(pair['elo'])} [{elo_to_string(pair['elo_low'])}, "
+              f"{elo_to_string(pair['elo_high'])}]", file=sys.stderr)
+    for name, statistics in summary["players"].items():
+        print(f"{name}: {statistics['wins']} wins, {statistics['draws']} draws, {statistics['losses']} losses, "
+              f"{statistics['time_per_move'] * 1000:.1f} ms per move", file=sys.stderr)
+    print(f"{summary['games']} games in {summary['elapsed']:.1f}s ({summary['games_per_minute']:.1f} per minute)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
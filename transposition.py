@@ -0,0 +1,80 @@
+import random
+
+# Global constant variable
+
+ZOBRIST_SEED = 20230403  # Fixed seed, so that the hash of a position is the same in every process
+ZOBRIST_KEYS = {}   # Zobrist keys, generated once for each (row_count, column_count)
+
+EXACT = 0   # The value stored is the exact value of the position
+LOWER_BOUND = 1  # The search failed high, the value of the position is at least the value stored
+UPPER_BOUND = 2  # The search failed low, the value of the position is at most the value stored
+
+
+# This function returns the Zobrist keys of a board size: one random 64 bits key for each (player key, box),
+# one key for each player to move and one key for the maximizing side of the search.
+# The hash of a position is the XOR of the keys of its pieces, which can be updated at each placed or flipped piece
+def zobrist_keys(row_count: int, column_count: int):
+    if (row_count, column_count) not in ZOBRIST_KEYS:
+        generator = random.Random(ZOBRIST_SEED + 1000 * row_count + column_count)
+        piece_keys = [[generator.getrandbits(64) for _ in range(row_count * column_count)] for _ in range(3)]
+        side_keys = [generator.getrandbits(64) for _ in range(3)]
+        maximizing_key = generator.getrandbits(64)
+        ZOBRIST_KEYS[(row_count, column_count)] = (piece_keys, side_keys, maximizing_key)
+    return ZOBRIST_KEYS[(row_count, column_count)]
+
+
+# This class represents the transposition table of the search: a fixed number of buckets indexed by the hash of the
+# position, each one holding two entries. The first entry keeps the deepest search (depth-preferred), the second one
+# always takes the last search (always-replace), so the memory used never grows during a game
+class TranspositionTable:
+    def __init__(self, size: int):
+        self.size = size    # Number of buckets of the table
+        self.depth_entries = [None] * size  # Depth-preferred entries: (hash, depth, bound, value, best move, age)
+        self.recent_entries = [None] * size  # Always-replace entries: (hash, depth, bound, value, best move, age)
+        self.age = 0    # Incremented at each new search, so that the entries of older searches can be replaced
+        # Statistics of the current search
+        self.probes = 0  # Number of lookups
+        self.hits = 0   # Number of lookups that found the position
+
+    # This method is called at the beginning of each search
+    def new_search(self):
+        self.age += 1
+        self.probes = 0
+        self.hits = 0
+
+    # This method returns the entry (hash, depth, bound, value, best move, age) of a position, or None if it is unknown
+    def probe(self, key: int):
+        self.probes += 1
+        index = key % self.size
+        entry = self.depth_entries[index]
+        if entry is None or entry[0] != key:
+            entry = self.recent_entries[index]
+            if entry is None or entry[0] != key:
+                return None
+        self.hits += 1
+        return entry
+
+    # This method saves the result of the search of a position
+    def store(self, key: int, depth: int, bound: int, value: float, best_move):
+        index = key % self.size
+        entry = (key, depth, bound, value, best_move, self.age)
+        old_entry = self.depth_entries[index]
+        # The depth-preferred entry is only replaced by a deeper search, or if it comes from an older search
+        if old_entry is None or old_entry[0] == key or depth >= old_entry[1] or old_entry[5] != self.age:
+            self.depth_entries[index] = entry
+        else:
+            self.recent_entries[index] = entry
+
+    # This method empties the table, it is used when a new game starts
+    def clear(self):
+        self.depth_entries = [None] * self.size
+        self.recent_entries = [None] * self.size
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+
+    # This method returns the proportion of the lookups that found the position
+    def hit_rate(self):
+        if self.probes == 0:
+            return 0.0
+        return self.hits / self.probes
@@ -0,0 +1,103 @@
+from engine import Engine, SearchCancelled, SCREEN_SIZE
+import queue
+import threading
+
+# Background search of the AI moves: the searches run on a thread of their own, so that the game keeps handling the
+# events of the window while the AI is thinking. The game submits a position and polls the task until it is done.
+
+
+# This class is one search submitted to the worker: a copy of the position, and its result when the search is done
+class SearchTask:
+    def __init__(self, board, player: int, depth: int, ponder: bool = False, time_limit: float = None):
+        self.board = board  # Copy of the board, owned by the task
+        self.player = player
+        self.depth = depth  # Depth of the search, or its maximum depth with a time limit
+        self.time_limit = time_limit    # If set, the search deepens until this time in seconds (Engine.search_timed)
+        self.ponder = ponder    # Whether the search is done in advance, on a position expected after the next move
+        self.key = (board.zobrist_hash, player, depth, time_limit)  # Identifies the searched position
+        self.best_move = None
+        self.value = None
+        self.principal_variation = []   # Principal variation of the search (empty for a book move)
+        self.cancelled = False
+        self.error = None   # Exception raised by the search, if it failed
+        self.done = threading.Event()   # Set when the search is finished or cancelled
+
+    # This method tells whether the result of the search is available
+    def is_done(self):
+        return self.done.is_set()
+
+
+# This class runs the searches of an engine on a background thread, one task after the other. The engine must not be
+# used by another thread while the worker is running
+class SearchWorker:
+    def __init__(self, engine: Engine, book=None):
+        self.engine = engine
+        self.book = book    # Opening book looked up before searching, if any (see book.py)
+        self.tasks = queue.Queue()  # Tasks waiting to be searched, None stops the thread
+        self.current_task = None    # Task being searched
+        self.lock = threading.Lock()    # Protects current_task and the stop requests of the engine
+        self.thread = threading.Thread(target=self.run, name="search-worker", daemon=True)
+        self.thread.start()
+
+    # This method submits the search of the best move of the player on the board. The board is copied, so the game can
+    # keep using it. It returns the task, to poll for the result
+    def submit(self, board, player: int, depth: int, ponder: bool = False, time_limit: float = None):
+        task = SearchTask(board.copy_board(SCREEN_SIZE), player, depth, ponder, time_limit)
+        self.tasks.put(task)
+        return task
+
+    # This method cancels a task: it is not searched if it is still waiting, and its search is stopped if it is in
+    # progress. If wait is True, the method returns only once the worker does not use the task anymore (the tasks
+    # submitted before it are searched first)
+    def cancel(self, task: SearchTask, wait: bool = True):
+        with self.lock:
+            task.cancelled = True
+            if self.current_task is task:
+                self.engine.request_stop()
+        if wait:
+            task.done.wait()
+
+    # This method is the loop of the worker thread
+    def run(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                break
+            with self.lock:
+                if task.cancelled:
+                    task.done.set()
+                    continue
+                self.current_task = task
+                self.engine.clear_stop()
+            try:
+                self.search(task)
+            except SearchCancelled:
+                task.cancelled = True
+            except Exception as error:  # The thread must keep running for the next tasks
+                task.error = error
+            finally:
+                with self.lock:
+                    self.current_task = None
+                task.done.set()
+
+    # This method searches the move of a task: the book move if there is one, otherwise the move found by the engine
+    def search(self, task: SearchTask):
+        if self.book is not None:
+            task.best_move, task.value = self.book.book_move(task.board, task.player)
+            if task.best_move is not None:
+                return
+        if task.time_limit is None:
+            task.best_move, task.value = self.engine.search(task.board, task.player, task.depth)
+        else:
+            task.best_move, task.value, _ = self.engine.search_timed(task.board, task.player, task.time_limit,
+                                                                     task.depth)
+        task.principal_variation = list(self.engine.stats.principal_variation)
+
+    # This method stops the worker thread, after cancelling the task in progress
+    def close(self):
+        with self.lock:
+            if self.current_task is not None:
+                self.current_task.cancelled = True
+                self.engine.request_stop()
+        self.tasks.put(None)
+        self.thread.join()